@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import re
+import time
+from itertools import islice
+from urllib.parse import parse_qsl, urlsplit
+import aiohttp
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import QuerySet
+from django.utils.http import parse_http_date_safe
+from . import metrics
+from .models import APIFetchResult
+
+RATE_UNITS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hr': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# Parses addapi_max_per_unit values such as "60/minute", "5/s" or "100 per hour"
+# into requests per second. A bare number is read as requests per second.
+def parse_rate(max_per_unit):
+    if not max_per_unit:
+        return None
+    match = re.fullmatch(
+        r'\s*(\d+(?:\.\d+)?)\s*(?:(?:/|per)\s*([a-z]+?)s?)?\s*', str(max_per_unit).lower())
+    if not match or float(match.group(1)) <= 0:
+        return None
+    seconds = RATE_UNITS.get(match.group(2) or 's')
+    if seconds is None:
+        return None
+    return float(match.group(1)) / seconds
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def build_request(api):
+    headers = {}
+    auth = None
+    if api.addapi_api_key:
+        headers[getattr(settings, 'API_FETCH_KEY_HEADER', 'X-API-Key')] = api.addapi_api_key
+    if api.addapi_username:
+        auth = aiohttp.BasicAuth(api.addapi_username, api.addapi_password or '')
+    return {
+        'method': (api.addapi_method or 'GET').upper(),
+        'url': api.addapi_url,
+        'params': parse_qsl((api.addapi_query or '').lstrip('?'), keep_blank_values=True),
+        'headers': headers,
+        'auth': auth,
+    }
+
+
+# Seconds to wait before retrying: the server's Retry-After (delay-seconds or an
+# HTTP date) capped at API_FETCH_MAX_RETRY_AFTER, otherwise exponential backoff
+def _retry_delay(attempt, response=None):
+    retry_after = response.headers.get('Retry-After', '').strip() if response is not None else ''
+    if retry_after.isdigit():
+        delay = float(retry_after)
+    elif retry_after and parse_http_date_safe(retry_after) is not None:
+        delay = max(0.0, parse_http_date_safe(retry_after) - time.time())
+    else:
+        return getattr(settings, 'API_FETCH_BACKOFF', 0.5) * (2 ** (attempt - 1))
+    return min(delay, getattr(settings, 'API_FETCH_MAX_RETRY_AFTER', 60))
+
+
+# Runs one definition, retrying connection errors and 429/5xx responses up to
+# addapi_max_attempts times with exponential backoff (or the server's Retry-After).
+# A stale cache entry turns the request into a conditional one.
+async def _fetch(session, api, request, bucket=None, entry=None):
+    max_attempts = max(1, api.addapi_max_attempts or 1)
+    max_body = getattr(settings, 'API_FETCH_MAX_BODY', 1024 * 1024)
+    if entry is not None:
+        request = dict(request, headers=dict(request['headers']))
+        if entry.etag:
+            request['headers']['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            request['headers']['If-Modified-Since'] = entry.last_modified
+    result = {'api': api, 'status_code': None, 'body': '', 'error': '', 'attempts': 0,
+              'etag': None, 'last_modified': None, 'from_cache': False}
+    started = time.monotonic()
+    for attempt in range(1, max_attempts + 1):
+        if bucket is not None:
+            await bucket.acquire()
+        result['attempts'] = attempt
+        try:
+            async with session.request(**request) as response:
+                result['status_code'] = response.status
+                result['body'] = (await response.content.read(max_body)).decode(
+                    response.get_encoding() if response.charset else 'utf-8', errors='replace')
+                result['error'] = ''
+                result['etag'] = response.headers.get('ETag')
+                result['last_modified'] = response.headers.get('Last-Modified')
+                if response.status not in RETRY_STATUSES or attempt == max_attempts:
+                    break
+                delay = _retry_delay(attempt, response)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            result['error'] = str(e) or e.__class__.__name__
+            if attempt == max_attempts:
+                break
+            delay = _retry_delay(attempt)
+        await asyncio.sleep(delay)
+    result['elapsed'] = time.monotonic() - started
+    return result
+
+
+class CacheEntry:
+    def __init__(self, status_code, body, etag, last_modified, ttl):
+        self.status_code = status_code
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.refresh(ttl)
+
+    # Wall-clock expiry, so it stays meaningful when read back by another process
+    def refresh(self, ttl):
+        self.expires_at = time.time() + ttl
+
+    def is_fresh(self):
+        return time.time() < self.expires_at
+
+
+# Successful GET/HEAD responses kept in the API_FETCH_CACHE cache alias, so freshness
+# and revalidation carry over between runs and processes. Entries are fresh for
+# API_FETCH_CACHE_TTL seconds; after that they are kept for ETag / Last-Modified
+# revalidation until API_FETCH_CACHE_TIMEOUT passes or the backend evicts them.
+class ResponseCache:
+    def __init__(self, ttl=None, timeout=None, alias=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'API_FETCH_CACHE_TTL', 300)
+        self.timeout = timeout or getattr(settings, 'API_FETCH_CACHE_TIMEOUT', 7 * 86400)
+        self.alias = alias or getattr(settings, 'API_FETCH_CACHE', 'default')
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    # Requests only share an entry when they would be sent with the same credentials
+    @staticmethod
+    def key_for(request):
+        auth = request['auth']
+        return 'api_fetch:' + hashlib.sha256(repr((
+            request['url'], request['method'], sorted(request['params']),
+            sorted(request['headers'].items()),
+            (auth.login, auth.password) if auth else None,
+        )).encode('utf-8')).hexdigest()
+
+    # The async cache API keeps backends that block (such as the database cache) off the
+    # event loop
+    async def get(self, key):
+        return await self.cache.aget(key)
+
+    async def set(self, key, entry):
+        await self.cache.aset(key, entry, max(self.timeout, self.ttl))
+
+    async def put(self, key, result):
+        await self.set(key, CacheEntry(
+            result['status_code'], result['body'], result['etag'], result['last_modified'], self.ttl))
+
+
+response_cache = ResponseCache()
+
+
+def _cached_result(api, entry):
+    return {'api': api, 'status_code': entry.status_code, 'body': entry.body, 'error': '',
+            'attempts': 0, 'elapsed': 0.0, 'etag': entry.etag,
+            'last_modified': entry.last_modified, 'from_cache': True}
+
+
+# Fetches a GET/HEAD definition, conditionally when a stale entry exists, and stores
+# the outcome: a 304 refreshes the entry and is answered from it, a 200 replaces it
+async def _fetch_and_cache(session, api, request, bucket, cache, key, entry):
+    result = await _fetch(session, api, request, bucket, entry)
+    if result['status_code'] == 304 and entry is not None:
+        entry.refresh(cache.ttl)
+        await cache.set(key, entry)
+        return dict(_cached_result(api, entry), attempts=result['attempts'],
+                    elapsed=result['elapsed'])
+    if result['status_code'] == 200 and not result['error']:
+        await cache.put(key, result)
+    return result
+
+
+# Serves GET/HEAD definitions from the cache while fresh, revalidates stale entries, and
+# lets concurrent definitions for the same request share a single in-flight fetch
+async def fetch_api(session, api, bucket=None, cache=None, inflight=None):
+    request = build_request(api)
+    if cache is None or request['method'] not in ('GET', 'HEAD'):
+        return await _fetch(session, api, request, bucket)
+    key = cache.key_for(request)
+    entry = await cache.get(key)
+    fresh = entry is not None and entry.is_fresh()
+    metrics.inc('pdfocrsummarize_cache_requests_total', {
+        'cache': 'api_response', 'result': 'hit' if fresh else 'miss'})
+    if fresh:
+        return _cached_result(api, entry)
+    if inflight is not None and key in inflight:
+        shared = await asyncio.shield(inflight[key])
+        return dict(shared, api=api, attempts=0, elapsed=0.0, from_cache=True)
+    task = asyncio.ensure_future(
+        _fetch_and_cache(session, api, request, bucket, cache, key, entry))
+    if inflight is not None:
+        inflight[key] = task
+    try:
+        return await task
+    finally:
+        if inflight is not None:
+            inflight.pop(key, None)
+
+
+def _host(api):
+    return urlsplit(api.addapi_url).netloc.lower()
+
+
+# One token bucket per host, shared by every definition that calls it, at the lowest
+# addapi_max_per_unit any of those definitions sets. Hosts with no rate get no bucket.
+def build_buckets(apis):
+    rates = {}
+    for api in apis:
+        rate = parse_rate(api.addapi_max_per_unit)
+        if rate:
+            host = _host(api)
+            rates[host] = min(rate, rates.get(host, rate))
+    return {host: TokenBucket(rate) for host, rate in rates.items()}
+
+
+# aiohttp sessions (and connectors) must be created inside the event loop that uses them
+async def open_session(connector=None):
+    connector = connector or aiohttp.TCPConnector(
+        limit=getattr(settings, 'API_FETCH_MAX_CONNECTIONS', 100),
+        limit_per_host=getattr(settings, 'API_FETCH_MAX_CONNECTIONS_PER_HOST', 10))
+    timeout = aiohttp.ClientTimeout(total=getattr(settings, 'API_FETCH_TIMEOUT', 30))
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+# Fetches a batch of definitions over the pooled session, rate limited per host, with
+# at most API_FETCH_CONCURRENCY of them in flight at once
+async def fetch_all(session, apis, buckets, cache=None, inflight=None):
+    semaphore = asyncio.Semaphore(getattr(settings, 'API_FETCH_CONCURRENCY', 100))
+
+    async def fetch(api):
+        async with semaphore:
+            return await fetch_api(session, api, buckets.get(_host(api)), cache, inflight)
+
+    return await asyncio.gather(*(fetch(api) for api in apis))
+
+
+def get_batch_size():
+    return getattr(settings, 'API_FETCH_BATCH_SIZE', 1000)
+
+
+def _iter_apis(apis, fields=None):
+    if isinstance(apis, QuerySet):
+        if fields:
+            apis = apis.only(*fields)
+        apis = apis.iterator(chunk_size=get_batch_size())
+    return (api for api in apis if api.addapi_url)
+
+
+# Runs the definitions (a queryset or a list) in batches of API_FETCH_BATCH_SIZE.
+# Each batch is fetched and then saved with its own bulk_create, so only one batch of
+# response bodies is held in memory and a crash keeps the batches already saved. The
+# session and the per-host rate limits carry over from batch to batch.
+# Returns (definitions fetched, failures).
+def run_api_fetches(apis, cache=response_cache, batch_size=None):
+    batch_size = batch_size or get_batch_size()
+    buckets = build_buckets(_iter_apis(apis, ('addapi_url', 'addapi_max_per_unit')))
+    inflight = {}
+    fetched = failed = 0
+    with asyncio.Runner() as runner:
+        session = runner.run(open_session())
+        try:
+            remaining = _iter_apis(apis)
+            while batch := list(islice(remaining, batch_size)):
+                results = runner.run(fetch_all(session, batch, buckets, cache, inflight))
+                APIFetchResult.objects.bulk_create([
+                    APIFetchResult(
+                        api=result['api'], status_code=result['status_code'], body=result['body'],
+                        error=result['error'], attempts=result['attempts'],
+                        elapsed=result['elapsed'], from_cache=result['from_cache'])
+                    for result in results
+                ])
+                fetched += len(results)
+                failed += sum(1 for result in results if result['error']
+                              or result['status_code'] is None or result['status_code'] >= 400)
+        finally:
+            runner.run(session.close())
+    return fetched, failed
@@ -0,0 +1,374 @@
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, transaction
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from . import views
+from .models import AppUserCompany, AppUserDepartment, AppUserGSText, APIFetchData, PdfOcrJob, StoredOutput
+from .ocr_jobs import enqueue_pdf_ocr
+from .ocr_pages import ocr_pdf_pages
+from .summarizer_engine import ALGORITHMS, get_summarizer_engine, summarize, summarize_stream
+
+WORDS = (
+    'elevator', 'inspection', 'maintenance', 'cable', 'motor', 'safety', 'load', 'floor',
+    'building', 'contract', 'invoice', 'service', 'technician', 'report', 'schedule',
+    'door', 'sensor', 'brake', 'control', 'panel', 'repair', 'customer', 'company',
+    'department', 'annual', 'monthly', 'certificate', 'permit', 'replacement', 'part',
+    'the', 'a', 'of', 'and', 'to', 'in', 'for', 'was', 'is', 'with', 'on', 'after',
+    'before', 'during', 'each', 'every', 'new', 'old', 'main', 'north', 'south', 'tower',
+)
+
+# (name, kind, pages). Digital PDFs carry a text layer; scanned ones are page images at
+# 200 DPI, and noisy ones are also skewed and speckled.
+PDF_FIXTURES = (
+    ('digital-1', 'digital', 1),
+    ('digital-10', 'digital', 10),
+    ('scanned-1', 'scanned', 1),
+    ('scanned-5', 'scanned', 5),
+    ('noisy-3', 'noisy', 3),
+)
+
+# Text fixture size -> sentences per document
+TEXT_SIZES = (('small', 20), ('medium', 200), ('large', 2000))
+
+SCAN_DPI = 200
+LINES_PER_PAGE = 40
+DEFAULT_ROW_COUNTS = (100, 1000, 10000)
+
+
+def make_sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def make_text(rng, sentence_count):
+    paragraphs = []
+    while sentence_count > 0:
+        size = min(sentence_count, rng.randint(3, 8))
+        paragraphs.append(' '.join(make_sentence(rng) for _ in range(size)))
+        sentence_count -= size
+    return '\n\n'.join(paragraphs)
+
+
+def make_page_lines(rng):
+    return [make_sentence(rng)[:80] for _ in range(LINES_PER_PAGE)]
+
+
+def _pdf_string(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+# Writes a born-digital PDF (Helvetica text, US Letter) without any PDF library
+def write_text_pdf(path, pages):
+    page_count = len(pages)
+    # 1 catalog, 2 page tree, 3 font, then a page object and a content stream per page
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        ('<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            ' '.join(f'{4 + 2 * i} 0 R' for i in range(page_count)), page_count)).encode('ascii'),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    for i, lines in enumerate(pages):
+        stream = 'BT /F1 11 Tf 14 TL 56 740 Td %s ET' % ' '.join(
+            f'({_pdf_string(line)}) Tj T*' for line in lines)
+        stream = stream.encode('latin-1')
+        objects.append((
+            '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            '/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (5 + 2 * i)
+        ).encode('ascii'))
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+
+    with open(path, 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+        xref = f.tell()
+        f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b'%010d 00000 n \n' % offset)
+        f.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+            len(objects) + 1, xref))
+
+
+def _font(size):
+    try:
+        return ImageFont.truetype('DejaVuSans.ttf', size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+# Writes an image-only PDF, one rendered page image per page, like a scanner would
+def write_scanned_pdf(path, pages, rng, noisy=False, dpi=SCAN_DPI):
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    font = _font(dpi // 7)
+    noise = np.random.default_rng(rng.randrange(2 ** 32))
+    images = []
+    for lines in pages:
+        image = Image.new('L', (width, height), 255)
+        draw = ImageDraw.Draw(image)
+        line_height = (height - 2 * dpi) // LINES_PER_PAGE
+        for i, line in enumerate(lines):
+            draw.text((dpi, dpi + i * line_height), line, fill=0, font=font)
+        if noisy:
+            image = image.rotate(rng.uniform(-3, 3), resample=Image.BICUBIC, fillcolor=255)
+            pixels = np.asarray(image).copy()
+            speckle = noise.random(pixels.shape)
+            pixels[speckle < 0.01] = 0
+            pixels[speckle > 0.99] = 255
+            image = Image.fromarray(pixels)
+        images.append(image)
+    images[0].save(path, 'PDF', resolution=dpi, save_all=True, append_images=images[1:])
+
+
+# Generates the fixture corpus into folder. The same seed always yields the same files.
+def build_corpus(folder, seed=0, text_docs=10):
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    corpus = {'pdfs': [], 'texts': []}
+    for name, kind, page_count in PDF_FIXTURES:
+        path = os.path.join(folder, f'{name}.pdf')
+        pages = [make_page_lines(rng) for _ in range(page_count)]
+        if kind == 'digital':
+            write_text_pdf(path, pages)
+        else:
+            write_scanned_pdf(path, pages, rng, noisy=kind == 'noisy')
+        corpus['pdfs'].append({'name': name, 'kind': kind, 'pages': page_count, 'path': path})
+    for size, sentence_count in TEXT_SIZES:
+        for i in range(text_docs):
+            path = os.path.join(folder, f'{size}-{i}.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(make_text(rng, sentence_count))
+            corpus['texts'].append({'size': size, 'path': path})
+    return corpus
+
+
+def latency_stats(samples):
+    samples = sorted(samples)
+    if len(samples) > 1:
+        cuts = statistics.quantiles(samples, n=100, method='inclusive')
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = samples[0]
+    return {
+        'count': len(samples), 'mean': statistics.fmean(samples),
+        'min': samples[0], 'p50': p50, 'p90': p90, 'p99': p99, 'max': samples[-1],
+    }
+
+
+def _clear_folder(folder):
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder, exist_ok=True)
+
+
+# The old whole-document OCR, kept for comparison where the pdf_ocr module is still
+# installed. Returns None when it is not.
+def _get_pdf_ocr_process():
+    try:
+        from .pdf_ocr import pdf_ocr_process
+    except ImportError:
+        return None
+    return pdf_ocr_process
+
+
+def _run_pdf_ocr_process(path):
+    with open(path, 'rb') as f:
+        output_filename = _get_pdf_ocr_process()(
+            UploadedFile(file=f, name=os.path.basename(path), size=os.path.getsize(path)))
+    os.remove(os.path.join(settings.PDF_OCR_OUTPUT_FOLDER, output_filename))
+
+
+# The path an upload to pdf_ocr takes: spool, queue, OCR the pages on the page pool and
+# write them to the output store. Waits for the job like a client polling its status.
+def _run_ocr_job(path):
+    with open(path, 'rb') as f:
+        job = enqueue_pdf_ocr(
+            UploadedFile(file=f, name=os.path.basename(path), size=os.path.getsize(path)))
+    while job.status == PdfOcrJob.STATUS_QUEUED:
+        time.sleep(0.01)
+        job.refresh_from_db()
+    if job.status == PdfOcrJob.STATUS_FAILED:
+        raise RuntimeError(f"OCR job failed: {job.error}")
+    job.delete()
+    StoredOutput.objects.filter(pk=job.output_id).delete()
+
+
+# Pages/sec of the queued OCR job, of the page-parallel ocr_pdf_pages on its own and,
+# where still installed, of the old whole-document pdf_ocr_process. The OCR cache is
+# emptied before every run so each one is cold.
+def bench_ocr(corpus, repeat=3):
+    cache_folder = settings.PDF_OCR_CACHE_FOLDER
+    paths = [('ocr_job', _run_ocr_job), ('ocr_pdf_pages', ocr_pdf_pages)]
+    if _get_pdf_ocr_process() is not None:
+        paths.append(('pdf_ocr_process', _run_pdf_ocr_process))
+    results = []
+    for fixture in corpus['pdfs']:
+        entry = {key: fixture[key] for key in ('name', 'kind', 'pages')}
+        for label, run in paths:
+            samples = []
+            for _ in range(repeat):
+                _clear_folder(cache_folder)
+                started = time.perf_counter()
+                run(fixture['path'])
+                samples.append(time.perf_counter() - started)
+            entry[label] = dict(
+                latency_stats(samples),
+                pages_per_sec=fixture['pages'] * len(samples) / sum(samples))
+        results.append(entry)
+    return results
+
+
+def _chunks(text, size=64 * 1024):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def _summarize_stream(text, sentence_count, algorithm):
+    return summarize_stream(_chunks(text), sentence_count, algorithm)
+
+
+def _summarize_streaming(text, sentence_count, algorithm):
+    with override_settings(SUMMARIZER_STREAM_THRESHOLD=0):
+        return summarize_stream(_chunks(text), sentence_count, algorithm)
+
+
+# (label, function, algorithms). summarize_stream is what the upload views call, fed
+# 64 KiB chunks; below SUMMARIZER_STREAM_THRESHOLD it buffers and runs the exact engine.
+# summarize_streaming forces the bounded-memory StreamingSummary path, which only
+# supports the frequency algorithm.
+SUMMARIZER_PATHS = (
+    ('summarize', summarize, None),
+    ('summarize_stream', _summarize_stream, None),
+    ('summarize_streaming', _summarize_streaming, ('frequency',)),
+)
+
+
+# Docs/sec and per-document latency of the shared summarizer engine, per entry point,
+# algorithm and document size. Model loading is excluded.
+def bench_summarizer(corpus, repeat=3, sentence_count=5):
+    get_summarizer_engine().load()
+    results = []
+    for path, function, algorithms in SUMMARIZER_PATHS:
+        for algorithm, _ in ALGORITHMS:
+            if algorithms is not None and algorithm not in algorithms:
+                continue
+            for size, _ in TEXT_SIZES:
+                texts = []
+                for fixture in corpus['texts']:
+                    if fixture['size'] == size:
+                        with open(fixture['path'], encoding='utf-8') as f:
+                            texts.append(f.read())
+                samples = []
+                for _ in range(repeat):
+                    for text in texts:
+                        started = time.perf_counter()
+                        function(text, sentence_count, algorithm)
+                        samples.append(time.perf_counter() - started)
+                results.append(dict(
+                    latency_stats(samples), path=path, algorithm=algorithm, size=size,
+                    docs_per_sec=len(samples) / sum(samples)))
+    return results
+
+
+# Table -> (list view, model, field values of the i-th synthetic row for a user)
+LIST_VIEWS = {
+    'companies': (views.appusercompany_list, AppUserCompany, lambda user, i: dict(
+        client_uid=user, parent_company_name=f'Company {i}', email=f'company{i}@example.com',
+        address=f'{i} Main Street', website=f'https://company{i}.example.com')),
+    'departments': (views.appuserdepartment_list, AppUserDepartment, lambda user, i: dict(
+        client_uid=user, department=f'Department {i % 50}', app_company_name=f'Company {i % 200}',
+        sub_ints=[f'Interest {j}' for j in range(i % 20)])),
+    'gstexts': (views.appusergstext_list, AppUserGSText, lambda user, i: dict(
+        client_uid=user, department=f'Department {i % 50}',
+        gstexts=[f'Text {j}' for j in range(i % 20)])),
+    'apidata': (views.apifetchdata_list, APIFetchData, lambda user, i: dict(
+        client_uid=user, department=f'Department {i % 50}', api_name=f'API {i}',
+        app_company_name=f'Company {i % 200}', addapi_url=f'https://api{i}.example.com/',
+        addapi_method='GET', addapi_max_attempts=3)),
+}
+
+
+# Render time and query count of the first list page as a user's table grows. Rows are
+# created in a transaction that is rolled back afterwards.
+def bench_list_views(row_counts=DEFAULT_ROW_COUNTS, repeat=5):
+    factory = RequestFactory()
+    results = []
+    with transaction.atomic():
+        user = User.objects.create(username=f'benchmark-{uuid.uuid4().hex}')
+        for table, (view, model, make_row) in LIST_VIEWS.items():
+            rows = 0
+            for row_count in sorted(row_counts):
+                model.objects.bulk_create(
+                    [model(**make_row(user, i)) for i in range(rows, row_count)], batch_size=1000)
+                rows = row_count
+                samples = []
+                for _ in range(repeat):
+                    request = factory.get('/')
+                    request.user = user
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        view(request).content
+                        samples.append(time.perf_counter() - started)
+                results.append(dict(
+                    latency_stats(samples), table=table, rows=row_count,
+                    queries=len(queries.captured_queries)))
+        transaction.set_rollback(True)
+    return results
+
+
+def get_environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'page_workers': getattr(settings, 'PDF_OCR_PAGE_WORKERS', None) or os.cpu_count(),
+    }
+
+
+SUITES = ('ocr', 'summarizer', 'list_views')
+
+
+# Runs the selected suites against a freshly generated corpus and returns a
+# JSON-serializable report. OCR output and cache files go to a scratch folder.
+def run_benchmarks(suites=SUITES, seed=0, repeat=3, row_counts=DEFAULT_ROW_COUNTS,
+                   corpus_folder=None, label=''):
+    report = {
+        'label': label,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'seed': seed,
+        'repeat': repeat,
+        'environment': get_environment(),
+    }
+    scratch = tempfile.mkdtemp(prefix='pdfocrsummarize-bench-')
+    try:
+        corpus = build_corpus(corpus_folder or os.path.join(scratch, 'corpus'), seed)
+        with override_settings(
+                PDF_OCR_CACHE_FOLDER=os.path.join(scratch, 'ocr_cache'),
+                PDF_OCR_OUTPUT_FOLDER=os.path.join(scratch, 'output')):
+            os.makedirs(settings.PDF_OCR_OUTPUT_FOLDER, exist_ok=True)
+            if 'ocr' in suites:
+                report['ocr'] = bench_ocr(corpus, repeat)
+            if 'summarizer' in suites:
+                report['summarizer'] = bench_summarizer(corpus, repeat)
+            if 'list_views' in suites:
+                report['list_views'] = bench_list_views(row_counts, repeat)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return report
+
+
+def format_report(report):
+    return json.dumps(report, indent=2, sort_keys=True)
@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+from django.conf import settings
+from django.db import transaction
+from django.forms import modelform_factory
+from django.utils import timezone
+from .forms import AppUserCompanyForm, AppUserDepartmentForm, AppUserGSTextForm, APIFetchDataForm
+from .models import AppUserCompany, AppUserDepartment, AppUserGSText, APIFetchData
+
+# Table name (matching the URL prefixes) -> (model, form used to validate imported rows)
+TABLES = {
+    'companies': (AppUserCompany, AppUserCompanyForm),
+    'departments': (AppUserDepartment, AppUserDepartmentForm),
+    'gstexts': (AppUserGSText, AppUserGSTextForm),
+    'apidata': (APIFetchData, APIFetchDataForm),
+}
+
+
+def get_batch_size():
+    return getattr(settings, 'BULK_IMPORT_BATCH_SIZE', 1000)
+
+
+def get_max_errors():
+    return getattr(settings, 'BULK_IMPORT_MAX_ERRORS', 100)
+
+
+def get_format(file_name, requested=None):
+    if requested in ('csv', 'json', 'jsonl'):
+        return requested
+    name = file_name.lower()
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'json' if name.endswith('.json') else 'csv'
+
+
+# Yields the elements of a JSON array one at a time, reading the text stream in chunks,
+# so a large file is never held in memory as a whole
+def _iter_json_array(stream, chunk_size=64 * 1024):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    expect = '['
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            if eof:
+                raise ValueError("Invalid JSON: the array is not closed.")
+            fill()
+            continue
+        if expect == '[':
+            if buffer[0] != '[':
+                raise ValueError("JSON import must be an array of objects.")
+            buffer = buffer[1:]
+            expect = 'value or ]'
+        elif expect != 'value' and buffer[0] == ']':
+            return
+        elif expect == ', or ]':
+            if buffer[0] != ',':
+                raise ValueError("Invalid JSON: expected ',' or ']' between rows.")
+            buffer = buffer[1:]
+            expect = 'value'
+        else:
+            try:
+                row, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                # Most likely a row cut off at the end of the buffer
+                if eof:
+                    raise ValueError(f"Invalid JSON: {e}")
+                fill()
+                continue
+            if end == len(buffer) and not eof:
+                # A number or literal may continue in the next chunk
+                fill()
+                continue
+            yield row
+            buffer = buffer[end:]
+            expect = ', or ]'
+
+
+# Yields one dict per row from a binary CSV (with header), JSON array or JSON Lines
+# file, reading it incrementally
+def parse_rows(binary_file, fmt):
+    text = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    if fmt == 'json':
+        yield from _iter_json_array(text)
+    elif fmt == 'jsonl':
+        for line in text:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON line: {e}")
+    else:
+        yield from csv.DictReader(text)
+
+
+def _form_data(row):
+    data = {}
+    for key, value in row.items():
+        if isinstance(value, (list, tuple)):
+            value = '\n'.join(str(v) for v in value)
+        data[key] = '' if value is None else value
+    return data
+
+
+# Validates every row through the table's ModelForm and writes them with bulk_create /
+# bulk_update in batches. Rows with an id update the user's existing row. Nothing is
+# written unless every row is valid. After BULK_IMPORT_MAX_ERRORS invalid rows the
+# import stops reading and sets error_limit_reached.
+def import_rows(table, rows, user, batch_size=None):
+    model, form_class = TABLES[table]
+    fields = list(form_class._meta.fields)
+    batch_size = batch_size or get_batch_size()
+    max_errors = get_max_errors()
+    result = {'created': 0, 'updated': 0, 'errors': [], 'error_limit_reached': False}
+    to_create, to_update = [], []
+
+    def flush():
+        if to_create:
+            model.objects.bulk_create(to_create, batch_size=batch_size)
+            result['created'] += len(to_create)
+            to_create.clear()
+        if to_update:
+            owned = set(model.objects.filter(
+                client_uid=user, pk__in=[obj.pk for obj in to_update]
+            ).values_list('pk', flat=True))
+            for obj in to_update:
+                if obj.pk not in owned:
+                    result['errors'].append({'id': obj.pk, 'errors': {'id': [
+                        {'message': "No such row.", 'code': 'does_not_exist'}]}})
+            update_fields = fields
+            if any(f.name == 'updated_at' for f in model._meta.fields):
+                # auto_now is not applied by bulk_update
+                now = timezone.now()
+                for obj in to_update:
+                    obj.updated_at = now
+                update_fields = fields + ['updated_at']
+            model.objects.bulk_update(
+                [obj for obj in to_update if obj.pk in owned], update_fields, batch_size=batch_size)
+            result['updated'] += len(owned)
+            to_update.clear()
+
+    with transaction.atomic():
+        for line, row in enumerate(rows, start=1):
+            if len(result['errors']) >= max_errors:
+                result['error_limit_reached'] = True
+                break
+            if not isinstance(row, dict):
+                result['errors'].append({'row': line, 'errors': {'__all__': [
+                    {'message': "Row must be an object.", 'code': 'invalid'}]}})
+                continue
+            pk = row.pop('id', None)
+            form = form_class(_form_data(row))
+            if not form.is_valid():
+                result['errors'].append({'row': line, 'errors': form.errors.get_json_data()})
+                continue
+            obj = form.save(commit=False)
+            obj.client_uid = user
+            if pk not in (None, ''):
+                try:
+                    obj.pk = int(pk)
+                except (TypeError, ValueError):
+                    result['errors'].append({'row': line, 'errors': {'id': [
+                        {'message': "Invalid id.", 'code': 'invalid'}]}})
+                    continue
+                to_update.append(obj)
+            else:
+                to_create.append(obj)
+            if len(to_create) + len(to_update) >= batch_size:
+                flush()
+        if not result['error_limit_reached']:
+            flush()
+        if result['errors']:
+            del result['errors'][max_errors:]
+            transaction.set_rollback(True)
+            result['created'] = result['updated'] = 0
+    return result
+
+
+def _owned_rows(table, user, ids):
+    model, _ = TABLES[table]
+    return model.objects.filter(client_uid=user, pk__in=ids)
+
+
+# Applies the non-empty submitted fields to every selected row with one UPDATE.
+# Returns (rows updated, None) or (0, form errors).
+def bulk_update_rows(table, user, ids, data):
+    model, form_class = TABLES[table]
+    fields = [f for f in form_class._meta.fields if data.get(f) not in (None, '')]
+    if not fields:
+        return 0, {'__all__': [{'message': "No fields to update.", 'code': 'required'}]}
+    form = modelform_factory(model, form=form_class, fields=fields)(data)
+    if not form.is_valid():
+        return 0, form.errors.get_json_data()
+    values = {f: form.cleaned_data[f] for f in fields}
+    if any(f.name == 'updated_at' for f in model._meta.fields):
+        # QuerySet.update() bypasses auto_now
+        values['updated_at'] = timezone.now()
+    with transaction.atomic():
+        return _owned_rows(table, user, ids).update(**values), None
+
+
+def bulk_delete_rows(table, user, ids):
+    model, _ = TABLES[table]
+    with transaction.atomic():
+        _, deleted = _owned_rows(table, user, ids).delete()
+    # The total also counts cascaded rows, so report the table's own count
+    return deleted.get(model._meta.label, 0)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _export_value(value):
+    if isinstance(value, (list, tuple)):
+        return '\n'.join(str(v) for v in value)
+    return value
+
+
+# Yields the user's rows as CSV (or a JSON array) chunk by chunk from a server-side iterator
+def iter_export(table, user, fmt='csv'):
+    model, form_class = TABLES[table]
+    columns = ['id'] + list(form_class._meta.fields)
+    rows = model.objects.filter(client_uid=user).order_by('pk').values_list(
+        *columns).iterator(chunk_size=get_batch_size())
+    if fmt == 'json':
+        yield '['
+        for i, row in enumerate(rows):
+            yield (',' if i else '') + json.dumps(dict(zip(columns, row)), default=str)
+        yield ']'
+        return
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_export_value(value) for value in row])
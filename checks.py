@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+from .models import user_profile_cache_is_shared
+
+
+@register()
+def check_user_profile_cache(app_configs, **kwargs):
+    if (f'{__package__}.middleware.UserProfileMiddleware' not in settings.MIDDLEWARE
+            or user_profile_cache_is_shared()):
+        return []
+    alias = getattr(settings, 'USER_PROFILE_CACHE', 'default')
+    return [Warning(
+        f"The '{alias}' cache used for user profiles is local to each process, so "
+        "profiles are not cached across requests.",
+        hint="Set USER_PROFILE_CACHE to a cache alias every worker shares, such as Redis "
+             "or Memcached.",
+        id='pdfocrsummarize.W001',
+    )]
@@ -3,21 +3,114 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from datetime import date
+from .ocr_pages import TESSERACT_OEM_CHOICES, TESSERACT_PSM_CHOICES
+from .summarizer_engine import ALGORITHMS
+from .uploads import get_max_upload_size
 # Ensure you have this model for additional fields
-from .models import UserProfile, AppUserCompany, AppUserDepartment, AppUserGSText, APIFetchData
+from .models import (
+    UserProfile, AppUserCompany, AppUserDepartment, AppUserGSText, APIFetchData, LIST_FIELD_SIZE
+)
 
 
+def validate_upload_size(uploaded_file):
+    max_size = get_max_upload_size()
+    if uploaded_file.size > max_size:
+        raise forms.ValidationError(
+            f"File is too large. The maximum size is {max_size} bytes.")
+
+
+# Upload for OCR, with the Tesseract options that can be chosen per request
 class PdfForm(forms.Form):
-    file = forms.FileField(label='Select a PDF file')
+    file = forms.FileField(label='Select a PDF file',
+                           validators=[validate_upload_size])
+    dpi = forms.IntegerField(
+        label='OCR resolution (DPI)',
+        validators=[MinValueValidator(72), MaxValueValidator(600)],
+        required=False,
+        widget=forms.NumberInput(attrs={'placeholder': 'Automatic'})
+    )
+    psm = forms.TypedChoiceField(
+        label='Page segmentation mode',
+        choices=[('', 'Default')] + TESSERACT_PSM_CHOICES,
+        coerce=int,
+        empty_value=None,
+        required=False
+    )
+    oem = forms.TypedChoiceField(
+        label='OCR engine mode',
+        choices=[('', 'Default')] + TESSERACT_OEM_CHOICES,
+        coerce=int,
+        empty_value=None,
+        required=False
+    )
+
+    # Keyword arguments for enqueue_pdf_ocr
+    def get_ocr_options(self):
+        return {name: self.cleaned_data[name] for name in ('dpi', 'psm', 'oem')}
 
 
 class SummarizerForm(forms.Form):
-    text_file = forms.FileField(label='Select text file')
+    text_file = forms.FileField(label='Select text file',
+                                validators=[validate_upload_size])
     sentence_count = forms.IntegerField(
         label='Desired sentence count in summary',
         validators=[MinValueValidator(1), MaxValueValidator(100)],
         widget=forms.NumberInput(attrs={'placeholder': 'Enter sentence count'})
     )
+    algorithm = forms.ChoiceField(
+        label='Summarization algorithm',
+        choices=ALGORITHMS,
+        initial='frequency',
+        required=False
+    )
+
+
+class PdfSummarizerForm(PdfForm):
+    field_order = ['file', 'sentence_count', 'algorithm']
+
+    sentence_count = forms.IntegerField(
+        label='Desired sentence count in summary',
+        validators=[MinValueValidator(1), MaxValueValidator(100)],
+        widget=forms.NumberInput(attrs={'placeholder': 'Enter sentence count'})
+    )
+    algorithm = forms.ChoiceField(
+        label='Summarization algorithm',
+        choices=ALGORITHMS,
+        initial='frequency',
+        required=False
+    )
+
+
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        if isinstance(data, (list, tuple)):
+            return [super(MultipleFileField, self).clean(d, initial) for d in data]
+        return [super().clean(data, initial)]
+
+
+class SummarizerBatchForm(forms.Form):
+    files = MultipleFileField(
+        label='Select text files or a .zip archive',
+        validators=[validate_upload_size]
+    )
+    sentence_count = forms.IntegerField(
+        label='Desired sentence count in summary',
+        validators=[MinValueValidator(1), MaxValueValidator(100)]
+    )
+    algorithm = forms.ChoiceField(
+        label='Summarization algorithm',
+        choices=ALGORITHMS,
+        initial='frequency',
+        required=False
+    )
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -143,6 +236,38 @@ class LoginForm(forms.Form):
 # elevator app table forms
 
 
+# Edits a list of short strings as a textarea with one value per line. Blank lines keep
+# their position; trailing blank lines are dropped.
+class LineListField(forms.CharField):
+    widget = forms.Textarea
+
+    def __init__(self, *, item_max_length=255, max_items=LIST_FIELD_SIZE, **kwargs):
+        kwargs.setdefault('required', False)
+        self.item_max_length = item_max_length
+        self.max_items = max_items
+        super().__init__(**kwargs)
+
+    def prepare_value(self, value):
+        if isinstance(value, (list, tuple)):
+            return '\n'.join(value)
+        return value
+
+    def to_python(self, value):
+        lines = [line.strip() for line in super().to_python(value).splitlines()]
+        while lines and not lines[-1]:
+            lines.pop()
+        return lines
+
+    def validate(self, value):
+        super().validate(value)
+        if len(value) > self.max_items:
+            raise forms.ValidationError(f"Enter at most {self.max_items} lines.")
+        for item in value:
+            if len(item) > self.item_max_length:
+                raise forms.ValidationError(
+                    f"Each line must be at most {self.item_max_length} characters.")
+
+
 class AppUserCompanyForm(forms.ModelForm):
     class Meta:
         model = AppUserCompany
@@ -150,22 +275,19 @@ class AppUserCompanyForm(forms.ModelForm):
 
 
 class AppUserDepartmentForm(forms.ModelForm):
+    sub_ints = LineListField(label='Sub interests (one per line)')
+
     class Meta:
         model = AppUserDepartment
-        fields = ('department', 'app_company_name', 'sub_int1', 'sub_int2',
-                  'sub_int3', 'sub_int4', 'sub_int5', 'sub_int6', 'sub_int7',
-                  'sub_int8', 'sub_int9', 'sub_int10', 'sub_int11', 'sub_int12',
-                  'sub_int13', 'sub_int14', 'sub_int15', 'sub_int16', 'sub_int17',
-                  'sub_int18', 'sub_int19', 'sub_int20')
+        fields = ('department', 'app_company_name', 'sub_ints')
 
 
 class AppUserGSTextForm(forms.ModelForm):
+    gstexts = LineListField(label='Texts (one per line)')
+
     class Meta:
         model = AppUserGSText
-        fields = ('department', 'gstext1', 'gstext2', 'gstext3', 'gstext4',
-                  'gstext5', 'gstext6', 'gstext7', 'gstext8', 'gstext9', 'gstext10',
-                  'gstext11', 'gstext12', 'gstext13', 'gstext14', 'gstext15',
-                  'gstext16', 'gstext17', 'gstext18', 'gstext19', 'gstext20')
+        fields = ('department', 'gstexts')
 
 
 class APIFetchDataForm(forms.ModelForm):
@@ -178,3 +300,13 @@ class APIFetchDataForm(forms.ModelForm):
                   'addapi_method', 'addapi_max_attempts', 'addapi_max_per_unit',
                   'addapi_description', 'addapi_terms_and_conditions',
                   'addapi_additional_notes_drop')
+
+
+class BulkImportForm(forms.Form):
+    file = forms.FileField(label='Select a CSV, JSON or JSON Lines file',
+                           validators=[validate_upload_size])
+    format = forms.ChoiceField(
+        choices=[('', 'Detect from file name'), ('csv', 'CSV'), ('json', 'JSON'),
+                 ('jsonl', 'JSON Lines')],
+        required=False
+    )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from ...benchmarks import DEFAULT_ROW_COUNTS, SUITES, format_report, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark OCR, summarization and list views on a synthetic corpus and print JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suite', action='append', choices=SUITES,
+                            help='Suite to run; repeat for several (default: all)')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROW_COUNTS),
+                            help='Table sizes for the list view suite')
+        parser.add_argument('--corpus-dir', help='Keep the generated corpus in this folder')
+        parser.add_argument('--label', default='', help='Recorded in the report, e.g. a version')
+        parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+
+    def handle(self, *args, **options):
+        report = run_benchmarks(
+            suites=options['suite'] or SUITES, seed=options['seed'], repeat=options['repeat'],
+            row_counts=options['rows'], corpus_folder=options['corpus_dir'], label=options['label'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(format_report(report) + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+        else:
+            self.stdout.write(format_report(report))
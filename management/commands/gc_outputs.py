@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from ...output_store import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Apply output retention and remove unreferenced blobs from the output store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int,
+                            help='Defaults to the OUTPUT_RETENTION_DAYS setting')
+
+    def handle(self, *args, **options):
+        records, blobs = collect_garbage(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {records} expired records and {blobs} unreferenced blobs."))
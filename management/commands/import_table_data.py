@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from ...bulk_data import TABLES, get_format, import_rows, parse_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import CSV, JSON or JSON Lines rows into one of the elevator app tables for a user'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(TABLES))
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Username that will own the rows')
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'])
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+        fmt = get_format(options['path'], options['format'])
+        with open(options['path'], 'rb') as f:
+            result = import_rows(
+                options['table'], parse_rows(f, fmt), user, options['batch_size'])
+        if result['errors']:
+            for error in result['errors'][:20]:
+                self.stderr.write(str(error))
+            if result['error_limit_reached']:
+                raise CommandError(
+                    f"Stopped after {len(result['errors'])} invalid rows; nothing was imported.")
+            raise CommandError(
+                f"{len(result['errors'])} invalid rows; nothing was imported.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']} and updated {result['updated']} rows."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from ...api_fetch import run_api_fetches
+from ...models import APIFetchData
+
+
+class Command(BaseCommand):
+    help = 'Execute the API definitions stored in APIFetchData and save the responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='APIFetchData ids (default: all)')
+        parser.add_argument('--user', help='Only run definitions owned by this username')
+
+    def handle(self, *args, **options):
+        apis = APIFetchData.objects.exclude(addapi_url__isnull=True).exclude(addapi_url='')
+        if options['ids']:
+            apis = apis.filter(pk__in=options['ids'])
+        if options['user']:
+            apis = apis.filter(client_uid__username=options['user'])
+        fetched, failed = run_api_fetches(apis)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fetched {fetched} APIs ({failed} failed)."))
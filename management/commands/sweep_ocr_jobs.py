@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from ...ocr_jobs import fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Fail PDF OCR jobs abandoned by a restarted worker and remove their spooled uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int,
+                            help='Seconds; defaults to the PDF_OCR_STALE_JOB_SECONDS setting')
+
+    def handle(self, *args, **options):
+        jobs, files = fail_stale_jobs(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Failed {jobs} stale jobs and removed {files} spooled uploads."))
@@ -0,0 +1,108 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauges = {}
+
+# HELP text for every metric the app records, so each one is described from its first
+# scrape no matter which code path records it first
+_help = {
+    'pdfocrsummarize_request_seconds': 'Request latency by view',
+    'pdfocrsummarize_request_db_queries': 'Database queries per request by view',
+    'pdfocrsummarize_stage_seconds': 'Time spent in each OCR and summarization stage',
+    'pdfocrsummarize_cache_requests_total': 'OCR and API response cache lookups',
+    'pdfocrsummarize_pages_total': 'PDF pages processed',
+    'pdfocrsummarize_ocr_dpi': 'Rasterization DPI of OCRed pages',
+    'pdfocrsummarize_ocr_queue_depth': 'OCR jobs queued or running in this process',
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def inc(name, labels=None, value=1):
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, labels=None, buckets=DEFAULT_BUCKETS):
+    with _lock:
+        key = _key(name, labels)
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': buckets, 'counts': [0] * len(buckets),
+                                            'count': 0, 'sum': 0.0}
+        for i, bound in enumerate(histogram['buckets']):
+            if value <= bound:
+                histogram['counts'][i] += 1
+        histogram['count'] += 1
+        histogram['sum'] += value
+
+
+# Gauges are read from a callback at scrape time, e.g. the current queue depth
+def register_gauge(name, callback):
+    with _lock:
+        _gauges[name] = callback
+
+
+def observe_stage(stage, seconds):
+    observe('pdfocrsummarize_stage_seconds', seconds, {'stage': stage})
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+# Prometheus text exposition format (version 0.0.4)
+def render():
+    lines = []
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: dict(v, counts=list(v['counts'])) for k, v in _histograms.items()}
+        gauges = dict(_gauges)
+    seen = set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f'# HELP {name} {_help[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name, 'counter')
+        lines.append(f'{name}{_format_labels(labels)} {value}')
+    for (name, labels), histogram in sorted(histograms.items()):
+        header(name, 'histogram')
+        for bound, count in zip(histogram['buckets'], histogram['counts']):
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {histogram["count"]}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {histogram["sum"]}')
+        lines.append(f'{name}_count{_format_labels(labels)} {histogram["count"]}')
+    for name, callback in sorted(gauges.items()):
+        header(name, 'gauge')
+        lines.append(f'{name} {callback()}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,132 @@
+import cProfile
+import os
+import random
+import time
+import uuid
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject
+from . import metrics
+from .models import (
+    UserProfile, get_user_profile_cache, user_profile_cache_is_shared, user_profile_cache_key
+)
+from .uploads import MaxUploadSizeHandler, get_max_upload_size
+
+# Cached marker for users without a profile, so they do not query every request
+NO_PROFILE = 'no-profile'
+
+
+# Reads the profile from the USER_PROFILE_CACHE cache alias, falling back to one query.
+# Saves and deletes of a profile clear its entry. The alias must be a backend shared by
+# every worker (e.g. Redis or Memcached): with a process-local locmem backend other
+# workers would keep stale profiles, so the profile is queried on every call instead.
+def get_user_profile(user):
+    if not user.is_authenticated:
+        return None
+    if not user_profile_cache_is_shared():
+        profile = UserProfile.objects.filter(user_id=user.pk).first()
+        if profile is not None:
+            profile.user = user
+        return profile
+    cache = get_user_profile_cache()
+    key = user_profile_cache_key(user.pk)
+    profile = cache.get(key)
+    if profile is None:
+        profile = UserProfile.objects.filter(user_id=user.pk).first() or NO_PROFILE
+        cache.set(key, profile, getattr(settings, 'USER_PROFILE_CACHE_TIMEOUT', 300))
+    if profile == NO_PROFILE:
+        return None
+    profile.user = user
+    return profile
+
+
+# Memoized on the request, so repeated lookups in one request are free
+def get_request_profile(request):
+    if not hasattr(request, '_cached_user_profile'):
+        request._cached_user_profile = get_user_profile(request.user)
+    return request._cached_user_profile
+
+
+# Exposes request.user_profile, loaded lazily on first access. Must come after
+# AuthenticationMiddleware.
+class UserProfileMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user_profile = SimpleLazyObject(lambda: get_request_profile(request))
+        return self.get_response(request)
+
+
+def _upload_too_large():
+    return HttpResponse(
+        f"Upload too large. The maximum size is {get_max_upload_size()} bytes.", status=413)
+
+
+# Enforces MAX_UPLOAD_SIZE before the request body is read: a larger Content-Length is
+# refused outright, and MaxUploadSizeHandler stops multipart bodies that grow past the
+# limit while streaming. Multipart bodies are parsed here, so a stopped upload is
+# answered with 413 before the view sees the part that did arrive. Must come before any
+# middleware that reads request.POST.
+class UploadLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > get_max_upload_size():
+            return _upload_too_large()
+        request.upload_handlers.insert(0, MaxUploadSizeHandler(request))
+        if request.method == 'POST' and request.content_type == 'multipart/form-data':
+            request.POST
+            if getattr(request, 'upload_too_large', False):
+                return _upload_too_large()
+        return self.get_response(request)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+# Records request latency and database query count per URL name. When
+# METRICS_PROFILE_SAMPLE_RATE is set, that fraction of requests runs under cProfile
+# and the stats are written to METRICS_PROFILE_FOLDER.
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        sample_rate = getattr(settings, 'METRICS_PROFILE_SAMPLE_RATE', 0)
+        profiler = cProfile.Profile() if sample_rate and random.random() < sample_rate else None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            if profiler is not None:
+                response = profiler.runcall(self.get_response, request)
+            else:
+                response = self.get_response(request)
+        seconds = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        labels = {'view': match.view_name if match else 'unresolved'}
+        metrics.observe('pdfocrsummarize_request_seconds', seconds, labels)
+        metrics.observe('pdfocrsummarize_request_db_queries', counter.count, labels,
+                        buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500))
+        if profiler is not None:
+            folder = getattr(settings, 'METRICS_PROFILE_FOLDER', None) or os.path.join(
+                settings.PDF_OCR_OUTPUT_FOLDER, 'profiles')
+            os.makedirs(folder, exist_ok=True)
+            profiler.dump_stats(os.path.join(
+                folder, f"{labels['view'].replace(':', '_')}-{uuid.uuid4().hex}.prof"))
+        return response
@@ -0,0 +1,149 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:31
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIFetchData',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(blank=True, max_length=255, null=True)),
+                ('api_name', models.CharField(max_length=255)),
+                ('app_store_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('app_company_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_newapi_drop', models.BooleanField(blank=True, null=True)),
+                ('addapi_api_focus_expl', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_api_key_required', models.BooleanField(blank=True, null=True)),
+                ('addapi_api_key', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_username', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_password', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_public_or_private_drop', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_url', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_query', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_method', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_max_attempts', models.IntegerField(blank=True, null=True)),
+                ('addapi_max_per_unit', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_description', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_terms_and_conditions', models.CharField(blank=True, max_length=255, null=True)),
+                ('addapi_additional_notes_drop', models.CharField(blank=True, max_length=255, null=True)),
+                ('client_uid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AppUserCompany',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parent_company_name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('address', models.CharField(max_length=255)),
+                ('website', models.CharField(max_length=255)),
+                ('client_uid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AppUserDepartment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=255)),
+                ('app_company_name', models.CharField(max_length=255)),
+                ('sub_int1', models.CharField(max_length=255)),
+                ('sub_int2', models.CharField(max_length=255)),
+                ('sub_int3', models.CharField(max_length=255)),
+                ('sub_int4', models.CharField(max_length=255)),
+                ('sub_int5', models.CharField(max_length=255)),
+                ('sub_int6', models.CharField(max_length=255)),
+                ('sub_int7', models.CharField(max_length=255)),
+                ('sub_int8', models.CharField(max_length=255)),
+                ('sub_int9', models.CharField(max_length=255)),
+                ('sub_int10', models.CharField(max_length=255)),
+                ('sub_int11', models.CharField(max_length=255)),
+                ('sub_int12', models.CharField(max_length=255)),
+                ('sub_int13', models.CharField(max_length=255)),
+                ('sub_int14', models.CharField(max_length=255)),
+                ('sub_int15', models.CharField(max_length=255)),
+                ('sub_int16', models.CharField(max_length=255)),
+                ('sub_int17', models.CharField(max_length=255)),
+                ('sub_int18', models.CharField(max_length=255)),
+                ('sub_int19', models.CharField(max_length=255)),
+                ('sub_int20', models.CharField(max_length=255)),
+                ('client_uid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AppUserGSText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=255)),
+                ('gstext1', models.CharField(max_length=255)),
+                ('gstext2', models.CharField(max_length=255)),
+                ('gstext3', models.CharField(max_length=255)),
+                ('gstext4', models.CharField(max_length=255)),
+                ('gstext5', models.CharField(max_length=255)),
+                ('gstext6', models.CharField(max_length=255)),
+                ('gstext7', models.CharField(max_length=255)),
+                ('gstext8', models.CharField(max_length=255)),
+                ('gstext9', models.CharField(max_length=255)),
+                ('gstext10', models.CharField(max_length=255)),
+                ('gstext11', models.CharField(max_length=255)),
+                ('gstext12', models.CharField(max_length=255)),
+                ('gstext13', models.CharField(max_length=255)),
+                ('gstext14', models.CharField(max_length=255)),
+                ('gstext15', models.CharField(max_length=255)),
+                ('gstext16', models.CharField(max_length=255)),
+                ('gstext17', models.CharField(max_length=255)),
+                ('gstext18', models.CharField(max_length=255)),
+                ('gstext19', models.CharField(max_length=255)),
+                ('gstext20', models.CharField(max_length=255)),
+                ('client_uid', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PdfOcrJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('output_filename', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cuid', models.CharField(max_length=255)),
+                ('date_assigned', models.DateField(blank=True, null=True)),
+                ('cash_app_name', models.CharField(blank=True, max_length=255)),
+                ('google_pay_integration', models.BooleanField(default=False)),
+                ('pay_pal_integration', models.BooleanField(default=False)),
+                ('date_of_birth', models.DateField()),
+                ('gender', models.CharField(choices=[('male', 'Male'), ('female', 'Female'), ('non_conforming', 'Non Conforming')], max_length=20)),
+                ('sir_name', models.CharField(blank=True, choices=[('human', 'Human'), ('mr', 'Mr.'), ('mrs', 'Mrs.'), ('ms', 'Ms.')], max_length=20)),
+                ('first_name', models.CharField(max_length=255)),
+                ('middle_name', models.CharField(blank=True, max_length=255)),
+                ('last_name', models.CharField(max_length=255)),
+                ('suffix_name', models.CharField(blank=True, choices=[('I', 'I'), ('II', 'II'), ('III', 'III'), ('Sr.', 'Sr.'), ('Jr.', 'Jr.')], max_length=20)),
+                ('language', models.CharField(choices=[('english', 'English'), ('mandarin', 'Mandarin Chinese'), ('hindi', 'Hindi'), ('spanish', 'Spanish'), ('french', 'French'), ('standard_arabic', 'Standard Arabic'), ('bengali', 'Bengali'), ('portuguese', 'Portuguese'), ('russian', 'Russian'), ('urdu', 'Urdu'), ('indonesian', 'Indonesian'), ('standard_german', 'Standard German')], max_length=50)),
+                ('address', models.TextField()),
+                ('mobile_phone', models.CharField(max_length=20)),
+                ('subscription_level', models.CharField(choices=[('partner', 'Partner'), ('free', 'Free'), ('professional', 'Professional'), ('executive', 'Executive')], max_length=20)),
+                ('date_added', models.DateField(auto_now_add=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
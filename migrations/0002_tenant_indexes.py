@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdfocrsummarize', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apifetchdata',
+            index=models.Index(fields=['client_uid', 'id'], name='pdfocrsumma_client__e91b36_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apifetchdata',
+            index=models.Index(fields=['client_uid', 'api_name', 'id'], name='pdfocrsumma_client__cf85f9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apifetchdata',
+            index=models.Index(fields=['client_uid', 'department'], name='pdfocrsumma_client__78ade0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apifetchdata',
+            index=models.Index(fields=['client_uid', 'app_company_name'], name='pdfocrsumma_client__974a71_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apifetchdata',
+            index=models.Index(fields=['client_uid', 'app_store_name'], name='pdfocrsumma_client__6d0242_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appusercompany',
+            index=models.Index(fields=['client_uid', 'id'], name='pdfocrsumma_client__ca723b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appusercompany',
+            index=models.Index(fields=['client_uid', 'parent_company_name', 'id'], name='pdfocrsumma_client__3a83b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appusercompany',
+            index=models.Index(fields=['client_uid', 'email', 'id'], name='pdfocrsumma_client__4b6a7a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appuserdepartment',
+            index=models.Index(fields=['client_uid', 'id'], name='pdfocrsumma_client__47b6e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appuserdepartment',
+            index=models.Index(fields=['client_uid', 'department', 'id'], name='pdfocrsumma_client__0bf224_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appuserdepartment',
+            index=models.Index(fields=['client_uid', 'app_company_name', 'id'], name='pdfocrsumma_client__89c3ec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appusergstext',
+            index=models.Index(fields=['client_uid', 'id'], name='pdfocrsumma_client__4cb2e9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appusergstext',
+            index=models.Index(fields=['client_uid', 'department', 'id'], name='pdfocrsumma_client__41ad43_idx'),
+        ),
+    ]
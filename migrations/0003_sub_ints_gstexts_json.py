@@ -0,0 +1,74 @@
+from django.db import migrations, models
+
+COLUMN_COUNT = 20
+
+
+# Moves sub_int1..20 / gstext1..20 into the list fields by position, dropping trailing
+# blanks, so get_sub_ints() / get_gstexts() return what the columns held
+def copy_columns_to_lists(apps, schema_editor):
+    for model_name, prefix, field in (('AppUserDepartment', 'sub_int', 'sub_ints'),
+                                      ('AppUserGSText', 'gstext', 'gstexts')):
+        model = apps.get_model('pdfocrsummarize', model_name)
+        columns = [f'{prefix}{i}' for i in range(1, COLUMN_COUNT + 1)]
+        batch = []
+        for row in model.objects.only('pk', *columns).iterator(chunk_size=1000):
+            values = [getattr(row, column) or '' for column in columns]
+            while values and not values[-1]:
+                values.pop()
+            setattr(row, field, values)
+            batch.append(row)
+            if len(batch) == 1000:
+                model.objects.bulk_update(batch, [field])
+                batch = []
+        model.objects.bulk_update(batch, [field])
+
+
+def copy_lists_to_columns(apps, schema_editor):
+    for model_name, prefix, field in (('AppUserDepartment', 'sub_int', 'sub_ints'),
+                                      ('AppUserGSText', 'gstext', 'gstexts')):
+        model = apps.get_model('pdfocrsummarize', model_name)
+        columns = [f'{prefix}{i}' for i in range(1, COLUMN_COUNT + 1)]
+        batch = []
+        for row in model.objects.only('pk', field).iterator(chunk_size=1000):
+            values = list(getattr(row, field))[:COLUMN_COUNT]
+            values += [''] * (COLUMN_COUNT - len(values))
+            for column, value in zip(columns, values):
+                setattr(row, column, value)
+            batch.append(row)
+            if len(batch) == 1000:
+                model.objects.bulk_update(batch, columns)
+                batch = []
+        model.objects.bulk_update(batch, columns)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdfocrsummarize', '0002_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appuserdepartment',
+            name='sub_ints',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='appusergstext',
+            name='gstexts',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(copy_columns_to_lists, copy_lists_to_columns),
+        # Gives the old columns a default so that unapplying RemoveField can add them
+        # back to existing rows
+        *[migrations.AlterField(model_name='appuserdepartment', name=f'sub_int{i}',
+                                field=models.CharField(max_length=255, default=''))
+          for i in range(1, COLUMN_COUNT + 1)],
+        *[migrations.AlterField(model_name='appusergstext', name=f'gstext{i}',
+                                field=models.CharField(max_length=255, default=''))
+          for i in range(1, COLUMN_COUNT + 1)],
+        *[migrations.RemoveField(model_name='appuserdepartment', name=f'sub_int{i}')
+          for i in range(1, COLUMN_COUNT + 1)],
+        *[migrations.RemoveField(model_name='appusergstext', name=f'gstext{i}')
+          for i in range(1, COLUMN_COUNT + 1)],
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdfocrsummarize', '0003_sub_ints_gstexts_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apifetchdata',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='apifetchdata',
+            index=models.Index(fields=['client_uid', 'updated_at'], name='pdfocrsumma_client__436568_idx'),
+        ),
+    ]
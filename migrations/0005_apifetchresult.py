@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdfocrsummarize', '0004_apifetchdata_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIFetchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fetched_at', models.DateTimeField(auto_now_add=True)),
+                ('status_code', models.IntegerField(blank=True, null=True)),
+                ('body', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('elapsed', models.FloatField(default=0)),
+                ('from_cache', models.BooleanField(default=False)),
+                ('api', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='pdfocrsummarize.apifetchdata')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['api', 'fetched_at'], name='pdfocrsumma_api_id_14e284_idx')],
+            },
+        ),
+    ]
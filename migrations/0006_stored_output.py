@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pdfocrsummarize', '0005_apifetchresult'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='pdfocrjob',
+            name='output_filename',
+        ),
+        migrations.AddField(
+            model_name='pdfocrjob',
+            name='summary_algorithm',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='pdfocrjob',
+            name='summary_sentence_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='StoredOutput',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ocr', 'OCR output'), ('summary', 'Summary')], max_length=20)),
+                ('source_name', models.CharField(max_length=255)),
+                ('digest', models.CharField(max_length=64)),
+                ('size', models.BigIntegerField()),
+                ('stored_size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pdfocrjob',
+            name='output',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='pdfocrsummarize.storedoutput'),
+        ),
+        migrations.AddField(
+            model_name='pdfocrjob',
+            name='summary',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pdfocrsummarize.storedoutput'),
+        ),
+        migrations.AddIndex(
+            model_name='storedoutput',
+            index=models.Index(fields=['digest'], name='pdfocrsumma_digest_1fcf56_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storedoutput',
+            index=models.Index(fields=['user', 'created_at'], name='pdfocrsumma_user_id_b61b4e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storedoutput',
+            index=models.Index(fields=['created_at'], name='pdfocrsumma_created_ca97a0_idx'),
+        ),
+    ]
@@ -1,4 +1,10 @@
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 
 
@@ -59,6 +65,34 @@ class UserProfile(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+def get_user_profile_cache():
+    return caches[getattr(settings, 'USER_PROFILE_CACHE', 'default')]
+
+
+# Invalidation only reaches the backend the saving process talks to, so profiles are
+# only cached across requests in a backend every worker shares
+def user_profile_cache_is_shared():
+    return not isinstance(get_user_profile_cache(), LocMemCache)
+
+
+def user_profile_cache_key(user_id):
+    return f'user_profile:{user_id}'
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_user_profile_cache(sender, instance, **kwargs):
+    get_user_profile_cache().delete(user_profile_cache_key(instance.user_id))
+
+
+# Positions in AppUserDepartment.sub_ints and AppUserGSText.gstexts
+LIST_FIELD_SIZE = 20
+
+
+def pad_list(values):
+    values = list(values)[:LIST_FIELD_SIZE]
+    return values + [''] * (LIST_FIELD_SIZE - len(values))
+
+
 class AppUserCompany(models.Model):
     client_uid = models.ForeignKey(User, on_delete=models.CASCADE)
     parent_company_name = models.CharField(max_length=255)
@@ -66,62 +100,52 @@ class AppUserCompany(models.Model):
     address = models.CharField(max_length=255)
     website = models.CharField(max_length=255)
 
+    # (client_uid, id) serves the default sort=id lists. It is not redundant with the
+    # client_uid foreign key index: PostgreSQL indexes do not carry the primary key.
+    class Meta:
+        indexes = [
+            models.Index(fields=['client_uid', 'id']),
+            models.Index(fields=['client_uid', 'parent_company_name', 'id']),
+            models.Index(fields=['client_uid', 'email', 'id']),
+        ]
+
 
 class AppUserDepartment(models.Model):
     client_uid = models.ForeignKey(User, on_delete=models.CASCADE)
     department = models.CharField(max_length=255)
     app_company_name = models.CharField(max_length=255)
-    sub_int1 = models.CharField(max_length=255)
-    sub_int2 = models.CharField(max_length=255)
-    sub_int3 = models.CharField(max_length=255)
-    sub_int4 = models.CharField(max_length=255)
-    sub_int5 = models.CharField(max_length=255)
-    sub_int6 = models.CharField(max_length=255)
-    sub_int7 = models.CharField(max_length=255)
-    sub_int8 = models.CharField(max_length=255)
-    sub_int9 = models.CharField(max_length=255)
-    sub_int10 = models.CharField(max_length=255)
-    sub_int11 = models.CharField(max_length=255)
-    sub_int12 = models.CharField(max_length=255)
-    sub_int13 = models.CharField(max_length=255)
-    sub_int14 = models.CharField(max_length=255)
-    sub_int15 = models.CharField(max_length=255)
-    sub_int16 = models.CharField(max_length=255)
-    sub_int17 = models.CharField(max_length=255)
-    sub_int18 = models.CharField(max_length=255)
-    sub_int19 = models.CharField(max_length=255)
-    sub_int20 = models.CharField(max_length=255)
+    # Up to LIST_FIELD_SIZE sub interests by position, formerly the sub_int1..sub_int20
+    # columns. Trailing blanks are not stored.
+    sub_ints = models.JSONField(default=list, blank=True)
 
+    # The 20 values the sub_intN columns held, '' where unset
     def get_sub_ints(self):
-        return [getattr(self, f'sub_int{i}') for i in range(1, 21)]
+        return pad_list(self.sub_ints)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['client_uid', 'id']),
+            models.Index(fields=['client_uid', 'department', 'id']),
+            models.Index(fields=['client_uid', 'app_company_name', 'id']),
+        ]
 
 
 class AppUserGSText(models.Model):
     client_uid = models.ForeignKey(User, on_delete=models.CASCADE)
     department = models.CharField(max_length=255)
-    gstext1 = models.CharField(max_length=255)
-    gstext2 = models.CharField(max_length=255)
-    gstext3 = models.CharField(max_length=255)
-    gstext4 = models.CharField(max_length=255)
-    gstext5 = models.CharField(max_length=255)
-    gstext6 = models.CharField(max_length=255)
-    gstext7 = models.CharField(max_length=255)
-    gstext8 = models.CharField(max_length=255)
-    gstext9 = models.CharField(max_length=255)
-    gstext10 = models.CharField(max_length=255)
-    gstext11 = models.CharField(max_length=255)
-    gstext12 = models.CharField(max_length=255)
-    gstext13 = models.CharField(max_length=255)
-    gstext14 = models.CharField(max_length=255)
-    gstext15 = models.CharField(max_length=255)
-    gstext16 = models.CharField(max_length=255)
-    gstext17 = models.CharField(max_length=255)
-    gstext18 = models.CharField(max_length=255)
-    gstext19 = models.CharField(max_length=255)
-    gstext20 = models.CharField(max_length=255)
+    # Up to LIST_FIELD_SIZE texts by position, formerly the gstext1..gstext20 columns.
+    # Trailing blanks are not stored.
+    gstexts = models.JSONField(default=list, blank=True)
 
+    # The 20 values the gstextN columns held, '' where unset
     def get_gstexts(self):
-        return [getattr(self, f'gstext{i}') for i in range(1, 21)]
+        return pad_list(self.gstexts)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['client_uid', 'id']),
+            models.Index(fields=['client_uid', 'department', 'id']),
+        ]
 
 
 class APIFetchData(models.Model):
@@ -151,3 +175,94 @@ class APIFetchData(models.Model):
         max_length=255, null=True, blank=True)
     addapi_additional_notes_drop = models.CharField(
         max_length=255, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['client_uid', 'id']),
+            models.Index(fields=['client_uid', 'api_name', 'id']),
+            models.Index(fields=['client_uid', 'department']),
+            models.Index(fields=['client_uid', 'app_company_name']),
+            models.Index(fields=['client_uid', 'app_store_name']),
+            models.Index(fields=['client_uid', 'updated_at']),
+        ]
+
+
+class APIFetchResult(models.Model):
+    api = models.ForeignKey(APIFetchData, on_delete=models.CASCADE, related_name='results')
+    fetched_at = models.DateTimeField(auto_now_add=True)
+    status_code = models.IntegerField(null=True, blank=True)
+    body = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    elapsed = models.FloatField(default=0)
+    from_cache = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['api', 'fetched_at']),
+        ]
+
+
+class StoredOutput(models.Model):
+    KIND_OCR = 'ocr'
+    KIND_SUMMARY = 'summary'
+
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=20, choices=[
+        (KIND_OCR, 'OCR output'),
+        (KIND_SUMMARY, 'Summary')
+    ])
+    source_name = models.CharField(max_length=255)
+    # SHA-256 of the uncompressed payload; also its location in the output store
+    digest = models.CharField(max_length=64)
+    size = models.BigIntegerField()
+    stored_size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['digest']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+    @property
+    def path(self):
+        from .output_store import blob_path
+        return blob_path(self.digest)
+
+    def open(self):
+        from .output_store import open_blob
+        return open_blob(self.digest)
+
+    def read(self):
+        from .output_store import read_blob
+        return read_blob(self.digest)
+
+
+class PdfOcrJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True)
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, default=STATUS_QUEUED, choices=[
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed')
+    ])
+    output = models.ForeignKey(
+        StoredOutput, on_delete=models.SET_NULL, null=True, blank=True)
+    # Set for jobs queued by the PDF summarizer, which summarize the OCR text once it is ready
+    summary_sentence_count = models.PositiveIntegerField(null=True, blank=True)
+    summary_algorithm = models.CharField(max_length=20, blank=True)
+    summary = models.ForeignKey(
+        StoredOutput, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+
+_evict_lock = threading.Lock()
+EVICT_STAMP = '.last_evicted'
+
+
+def get_cache_folder():
+    return getattr(settings, 'PDF_OCR_CACHE_FOLDER', None) or os.path.join(
+        settings.PDF_OCR_OUTPUT_FOLDER, '.ocr_cache')
+
+
+# The key covers the content and every option that changes the OCR output
+def cache_key(digest, options):
+    raw = f"{digest}:{json.dumps(options, sort_keys=True)}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _write_atomic(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _entries(folder):
+    for dirpath, _, filenames in os.walk(folder):
+        for name in filenames:
+            if name == EVICT_STAMP:
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield st.st_mtime, st.st_size, path
+
+
+# Hits refresh the mtime, so removing the oldest files first gives LRU order
+def evict():
+    folder = get_cache_folder()
+    max_bytes = getattr(settings, 'PDF_OCR_CACHE_MAX_BYTES', 1024 ** 3)
+    with _evict_lock:
+        entries = sorted(_entries(folder))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+# evict() stats every file in the cache, far too much to do for every upload, so jobs
+# call this instead: it runs evict() at most once per PDF_OCR_CACHE_EVICT_INTERVAL
+# seconds across all processes, timed by the stamp file's mtime. Between passes the
+# cache can grow past PDF_OCR_CACHE_MAX_BYTES by what is written in the meantime.
+def maybe_evict():
+    folder = get_cache_folder()
+    stamp = os.path.join(folder, EVICT_STAMP)
+    try:
+        if time.time() - os.stat(stamp).st_mtime < getattr(
+                settings, 'PDF_OCR_CACHE_EVICT_INTERVAL', 300):
+            return False
+    except FileNotFoundError:
+        os.makedirs(folder, exist_ok=True)
+    # Claim the pass before scanning so other processes skip it
+    with open(stamp, 'a'):
+        os.utime(stamp)
+    evict()
+    return True
+
+
+# Documents map to the digest of their OCR output in the output store
+def get_document(key):
+    path = os.path.join(get_cache_folder(), 'docs', key[:2], key)
+    try:
+        with open(path, 'rb') as f:
+            digest = f.read().decode('ascii').strip()
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return digest or None
+
+
+def put_document(key, digest):
+    path = os.path.join(get_cache_folder(), 'docs', key[:2], key)
+    _write_atomic(path, lambda f: f.write(digest.encode('ascii')))
+    maybe_evict()
+
+
+def get_page_text(key):
+    path = os.path.join(get_cache_folder(), 'pages', key[:2], key + '.txt')
+    try:
+        with open(path, 'rb') as f:
+            text = f.read().decode('utf-8')
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return text
+
+
+def put_page_text(key, text):
+    path = os.path.join(get_cache_folder(), 'pages', key[:2], key + '.txt')
+    _write_atomic(path, lambda f: f.write(text.encode('utf-8')))
@@ -0,0 +1,188 @@
+import codecs
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from . import metrics, ocr_cache
+from .models import PdfOcrJob, StoredOutput
+from .ocr_pages import get_ocr_options, iter_page_texts
+from .output_store import save_bytes, save_chunks, save_existing
+from .search_index import index_document
+from .summarizer_engine import summarize_stream
+from .uploads import remove_stale_spool_files, spool_upload
+
+_executor = None
+_executor_lock = threading.Lock()
+# Jobs submitted by this process that have not finished yet
+_pending = 0
+
+metrics.register_gauge('pdfocrsummarize_ocr_queue_depth', lambda: _pending)
+
+
+# Jobs run on threads: each one only feeds pages to the shared page process pool
+# (ocr_pages.get_page_executor) and writes the result, so no process pool is nested
+# inside another. The pool is created on first use.
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            return _executor
+        workers = getattr(settings, 'PDF_OCR_WORKERS', None) or 4
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pdf-ocr-job')
+    # A new pool means a new worker process, which is when jobs abandoned by a
+    # previous one are most likely to be found
+    _executor.submit(_sweep_stale_jobs)
+    return _executor
+
+
+def get_stale_job_age():
+    return getattr(settings, 'PDF_OCR_STALE_JOB_SECONDS', None) or 2 * 60 * 60
+
+
+# Jobs only live in the ThreadPoolExecutor of the process that queued them, so a worker
+# restart (deploy, gunicorn max_requests) leaves them queued forever. Fails queued jobs
+# older than PDF_OCR_STALE_JOB_SECONDS and removes spooled uploads as old as that.
+# Returns (failed jobs, removed spool files).
+def fail_stale_jobs(max_age=None):
+    if max_age is None:
+        max_age = get_stale_job_age()
+    jobs = PdfOcrJob.objects.filter(
+        status=PdfOcrJob.STATUS_QUEUED,
+        created_at__lt=timezone.now() - timedelta(seconds=max_age)
+    ).update(
+        status=PdfOcrJob.STATUS_FAILED,
+        error="Job was interrupted before it finished; please upload the file again.",
+        finished_at=timezone.now()
+    )
+    return jobs, remove_stale_spool_files(max_age)
+
+
+def _sweep_stale_jobs():
+    try:
+        fail_stale_jobs()
+    except Exception as e:
+        with open(settings.PDF_OCR_ERROR_LOG_PATH, 'a') as f:
+            f.write(f"Error: {str(e)}\n")
+    finally:
+        connection.close()
+
+
+# Adds a finished job's OCR text to the owner's search index
+def index_job_output(job):
+    if job.user_id is None or job.output is None:
+        return
+    try:
+        text = job.output.read().decode('utf-8', errors='ignore')
+        index_document(job.user_id, 'ocr', job.file_name, text, job.pk, job.output_id)
+    except Exception as e:
+        with open(settings.PDF_OCR_ERROR_LOG_PATH, 'a') as f:
+            f.write(f"Error: {str(e)}\n")
+
+
+# Summarizes a job's OCR text into the output store and the owner's search index
+def summarize_job_output(job):
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    with job.output.open() as f:
+        results = summarize_stream(
+            (decoder.decode(chunk) for chunk in iter(lambda: f.read(64 * 1024), b'')),
+            job.summary_sentence_count, job.summary_algorithm or 'frequency')
+    if results is None:
+        raise ValueError("Summarization failed.")
+    summary = save_bytes(
+        job.user, StoredOutput.KIND_SUMMARY, job.file_name,
+        json.dumps(results, separators=(',', ':')).encode('utf-8'))
+    if job.user_id is not None:
+        index_document(job.user_id, 'summary', job.file_name, ' '.join(results['summary']),
+                       summary.digest, summary.pk)
+    return summary
+
+
+# OCRs the spooled PDF page by page straight into the output store, then summarizes it
+# if the job asks for a summary. Jobs whose OCR output was cached arrive with their
+# output set and no spooled file.
+def _run_pdf_ocr(job_id, spool_path, key, options):
+    global _pending
+    started = time.perf_counter()
+    try:
+        job = PdfOcrJob.objects.select_related('user', 'output').get(pk=job_id)
+        if job.status != PdfOcrJob.STATUS_QUEUED:
+            # Already failed by fail_stale_jobs
+            return
+        try:
+            if job.output is None:
+                pages = iter_page_texts(spool_path, options=options)
+                job.output = save_chunks(
+                    job.user, StoredOutput.KIND_OCR, job.file_name,
+                    ((text + '\n\n').encode('utf-8') for text in pages))
+                metrics.observe_stage('ocr_document', time.perf_counter() - started)
+                ocr_cache.put_document(key, job.output.digest)
+            if job.summary_sentence_count:
+                job.summary = summarize_job_output(job)
+        except Exception as e:
+            with open(settings.PDF_OCR_ERROR_LOG_PATH, 'a') as f:
+                f.write(f"Error: {str(e)}\n")
+            job.status = PdfOcrJob.STATUS_FAILED
+            job.error = str(e)
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'output', 'error', 'finished_at'])
+        else:
+            job.status = PdfOcrJob.STATUS_DONE
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'output', 'summary', 'finished_at'])
+            index_job_output(job)
+    finally:
+        if spool_path is not None:
+            try:
+                os.remove(spool_path)
+            except FileNotFoundError:
+                # Removed by fail_stale_jobs while this job was still running
+                pass
+        with _executor_lock:
+            _pending -= 1
+        # Job threads are not request threads, so nothing else closes their connection
+        connection.close()
+
+
+# Queue an uploaded PDF for OCR and return the job without waiting for it.
+# Uploads already OCR'd with the same options come back as a finished job, unless a
+# summary is requested (summary_sentence_count), which always runs in the queue.
+def enqueue_pdf_ocr(uploaded_file, user=None, summary_sentence_count=None,
+                    summary_algorithm='', **ocr_options):
+    spool_path, digest = spool_upload(uploaded_file)
+    options = get_ocr_options(**ocr_options)
+    key = ocr_cache.cache_key(digest, options)
+    job = PdfOcrJob(
+        user=user if user is not None and user.is_authenticated else None,
+        file_name=uploaded_file.name,
+        summary_sentence_count=summary_sentence_count,
+        summary_algorithm=summary_algorithm or ''
+    )
+    cached_digest = ocr_cache.get_document(key)
+    if cached_digest is not None:
+        job.output = save_existing(job.user, StoredOutput.KIND_OCR, job.file_name, cached_digest)
+    metrics.inc('pdfocrsummarize_cache_requests_total', {
+        'cache': 'ocr_document', 'result': 'miss' if job.output is None else 'hit'})
+    if job.output is not None:
+        os.remove(spool_path)
+        spool_path = None
+        if not summary_sentence_count:
+            job.status = PdfOcrJob.STATUS_DONE
+            job.finished_at = timezone.now()
+            job.save()
+            index_job_output(job)
+            return job
+    job.save()
+
+    def submit():
+        global _pending
+        with _executor_lock:
+            _pending += 1
+        get_executor().submit(_run_pdf_ocr, job.pk, spool_path, key, options)
+
+    transaction.on_commit(submit)
+    return job
@@ -0,0 +1,185 @@
+import hashlib
+import multiprocessing
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pytesseract
+from django.conf import settings
+from pdf2image import convert_from_path, pdfinfo_from_path
+from . import metrics, ocr_preprocess
+from .ocr_cache import cache_key, get_page_text, maybe_evict, put_page_text
+
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+
+# Workers come from a forkserver, not a fork of the threaded web process (see
+# summarizer_batch.get_batch_executor)
+def get_page_executor():
+    global _page_executor
+    with _page_executor_lock:
+        if _page_executor is None:
+            workers = getattr(settings, 'PDF_OCR_PAGE_WORKERS', None) or os.cpu_count()
+            _page_executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('forkserver'))
+        return _page_executor
+
+
+# Tesseract page segmentation (--psm) and engine (--oem) modes offered per request
+TESSERACT_PSM_CHOICES = [
+    (3, 'Fully automatic page segmentation'),
+    (1, 'Automatic, with orientation and script detection'),
+    (4, 'Single column of text'),
+    (6, 'Single uniform block of text'),
+    (11, 'Sparse text'),
+    (12, 'Sparse text, with orientation and script detection'),
+]
+TESSERACT_OEM_CHOICES = [
+    (3, 'Default engine'),
+    (1, 'LSTM neural network'),
+    (0, 'Legacy engine'),
+    (2, 'Legacy and LSTM combined'),
+]
+
+
+# A dpi of None rasterizes each page at a DPI picked from a low-resolution probe
+def get_ocr_options(lang=None, config=None, dpi=None, psm=None, oem=None, preprocess=None):
+    options = {
+        'lang': lang or getattr(settings, 'PDF_OCR_LANG', 'eng'),
+        'config': config if config is not None else getattr(settings, 'PDF_OCR_CONFIG', ''),
+        'dpi': dpi or getattr(settings, 'PDF_OCR_DPI', None),
+        'psm': psm if psm is not None else getattr(settings, 'PDF_OCR_PSM', None),
+        'oem': oem if oem is not None else getattr(settings, 'PDF_OCR_OEM', None),
+        'preprocess': preprocess if preprocess is not None else getattr(
+            settings, 'PDF_OCR_PREPROCESS', True),
+        'auto_dpi': None,
+    }
+    if not options['dpi']:
+        options['auto_dpi'] = {
+            'probe': getattr(settings, 'PDF_OCR_PROBE_DPI', 100),
+            'min': getattr(settings, 'PDF_OCR_MIN_DPI', 150),
+            'max': getattr(settings, 'PDF_OCR_MAX_DPI', 400),
+            # Tesseract's LSTM models scale text lines to about this height anyway
+            'line_height': getattr(settings, 'PDF_OCR_TARGET_LINE_HEIGHT', 36),
+        }
+    return options
+
+
+def tesseract_config(options):
+    parts = []
+    if options['psm'] is not None:
+        parts.append(f"--psm {options['psm']}")
+    if options['oem'] is not None:
+        parts.append(f"--oem {options['oem']}")
+    if options['config']:
+        parts.append(options['config'])
+    return ' '.join(parts)
+
+
+def _rasterize(pdf_path, page_number, dpi):
+    return convert_from_path(
+        pdf_path, dpi=dpi, first_page=page_number, last_page=page_number, grayscale=True)[0]
+
+
+def _image_digest(image):
+    return hashlib.sha256(
+        f"{image.mode}:{image.size}:".encode('utf-8') + image.tobytes()).hexdigest()
+
+
+# Rasterizes, preprocesses and OCRs a single page; runs inside a worker process, so
+# stage timings are returned to the parent rather than recorded here. With automatic
+# DPI the cache is keyed on the probe raster, so a hit never renders the full page.
+def _ocr_page(pdf_path, page_number, options):
+    started = time.perf_counter()
+    auto_dpi = options['auto_dpi']
+    image = _rasterize(pdf_path, page_number, auto_dpi['probe'] if auto_dpi else options['dpi'])
+    key = cache_key(_image_digest(image), options)
+    text = get_page_text(key)
+    timings = {'rasterize': time.perf_counter() - started, 'cache_hit': text is not None}
+    if text is not None:
+        return text, timings
+
+    analysis = None
+    if auto_dpi:
+        analysis = ocr_preprocess.analyze_page(ocr_preprocess.to_pixels(image), auto_dpi['probe'])
+        timings['dpi'] = ocr_preprocess.choose_dpi(
+            analysis, auto_dpi['min'], auto_dpi['max'], auto_dpi['line_height'])
+        started = time.perf_counter()
+        image = _rasterize(pdf_path, page_number, timings['dpi'])
+        timings['rasterize'] += time.perf_counter() - started
+    else:
+        timings['dpi'] = options['dpi']
+    if options['preprocess']:
+        started = time.perf_counter()
+        if analysis is None:
+            analysis = ocr_preprocess.analyze_page(ocr_preprocess.to_pixels(image), options['dpi'])
+        image = ocr_preprocess.preprocess(image, analysis)
+        timings['preprocess'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    text = pytesseract.image_to_string(image, lang=options['lang'], config=tesseract_config(options))
+    timings['ocr_page'] = time.perf_counter() - started
+    put_page_text(key, text)
+    return text, timings
+
+
+def _record_page_metrics(timings):
+    metrics.observe_stage('rasterize', timings['rasterize'])
+    for stage in ('preprocess', 'ocr_page'):
+        if stage in timings:
+            metrics.observe_stage(stage, timings[stage])
+    if 'dpi' in timings:
+        metrics.observe('pdfocrsummarize_ocr_dpi', timings['dpi'],
+                        buckets=(100, 150, 200, 250, 300, 400, 600))
+    metrics.inc('pdfocrsummarize_cache_requests_total', {
+        'cache': 'ocr_page', 'result': 'hit' if timings['cache_hit'] else 'miss'})
+
+
+# Pulls the embedded text of every page with pdftotext (poppler, as used by pdf2image).
+# Returns an empty list when the document has no usable text layer.
+def extract_text_layer(pdf_path):
+    result = subprocess.run(
+        ['pdftotext', '-layout', '-enc', 'UTF-8', pdf_path, '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if result.returncode != 0:
+        return []
+    # pdftotext ends every page with a form feed
+    return result.stdout.decode('utf-8', errors='replace').split('\f')[:-1]
+
+
+def has_text_layer(text):
+    min_chars = getattr(settings, 'PDF_OCR_TEXT_LAYER_MIN_CHARS', 32)
+    return len(''.join(text.split())) >= min_chars
+
+
+# Yields the text of each page in page order while later pages are still being processed.
+# Pages with an embedded text layer skip rasterization and OCR entirely. Callers that
+# already resolved get_ocr_options() (e.g. for a cache key) pass the result as options.
+def iter_page_texts(pdf_path, lang=None, config=None, dpi=None, psm=None, oem=None,
+                    preprocess=None, options=None):
+    if options is None:
+        options = get_ocr_options(lang, config, dpi, psm, oem, preprocess)
+    page_count = pdfinfo_from_path(pdf_path)['Pages']
+    text_layer = extract_text_layer(pdf_path)
+    if len(text_layer) != page_count:
+        text_layer = [''] * page_count
+    executor = get_page_executor()
+    futures = {
+        page_number: executor.submit(_ocr_page, pdf_path, page_number, options)
+        for page_number, text in enumerate(text_layer, start=1)
+        if not has_text_layer(text)
+    }
+    metrics.inc('pdfocrsummarize_pages_total', {'source': 'text_layer'}, page_count - len(futures))
+    metrics.inc('pdfocrsummarize_pages_total', {'source': 'ocr'}, len(futures))
+    for page_number, text in enumerate(text_layer, start=1):
+        if page_number in futures:
+            text, timings = futures.pop(page_number).result()
+            _record_page_metrics(timings)
+        yield text
+    maybe_evict()
+
+
+def ocr_pdf_pages(pdf_path, **options):
+    return list(iter_page_texts(pdf_path, **options))
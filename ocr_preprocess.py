@@ -0,0 +1,115 @@
+import numpy as np
+from PIL import Image
+from scipy import ndimage
+
+# Share of ink pixels with no inked neighbour above which a page counts as speckled
+NOISE_RATIO = 0.02
+# Skew (degrees) below which a page is left unrotated
+MIN_SKEW = 0.2
+MAX_SKEW = 5.0
+SKEW_STEP = 0.25
+# Ink pixels sampled for the skew search
+SKEW_SAMPLES = 20000
+
+
+def to_pixels(image):
+    return np.asarray(image.convert('L'), dtype=np.uint8)
+
+
+# Otsu's method: the grey level that maximizes the between-class variance
+def otsu_threshold(pixels):
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    dark_weight = np.cumsum(histogram)
+    light_weight = dark_weight[-1] - dark_weight
+    dark_sum = np.cumsum(histogram * levels)
+    dark_mean = dark_sum / np.maximum(dark_weight, 1)
+    light_mean = (dark_sum[-1] - dark_sum) / np.maximum(light_weight, 1)
+    variance = dark_weight * light_weight * (dark_mean - light_mean) ** 2
+    return int(np.argmax(variance))
+
+
+def noise_ratio(ink):
+    neighbours = ndimage.convolve(ink.astype(np.uint8), np.ones((3, 3), np.uint8), mode='constant')
+    isolated = ink & (neighbours == 1)
+    return float(isolated.sum()) / max(int(ink.sum()), 1)
+
+
+# Median height in pixels of the bands of rows that contain text
+def text_line_height(ink):
+    rows = ink.sum(axis=1)
+    if not rows.any():
+        return None
+    text_rows = np.concatenate(([0], (rows > 0.05 * rows.max()).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(text_rows))
+    heights = edges[1::2] - edges[::2]
+    return float(np.median(heights)) if len(heights) else None
+
+
+# Angle in degrees (counterclockwise) of the text lines, found by projecting a sample
+# of ink pixels at each candidate angle and keeping the sharpest row profile
+def estimate_skew(ink):
+    ys, xs = np.nonzero(ink)
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > SKEW_SAMPLES:
+        picked = np.random.default_rng(0).choice(len(ys), SKEW_SAMPLES, replace=False)
+        ys, xs = ys[picked], xs[picked]
+    angles = np.arange(-MAX_SKEW, MAX_SKEW + SKEW_STEP / 2, SKEW_STEP)
+    radians = np.deg2rad(angles)[:, None]
+    rows = np.rint(ys * np.cos(radians) + xs * np.sin(radians)).astype(np.int64)
+    rows -= rows.min()
+    scores = [np.square(np.bincount(projection)).sum() for projection in rows]
+    return float(angles[int(np.argmax(scores))])
+
+
+# Content statistics used both to pick the rasterization DPI and to decide which
+# preprocessing steps a page needs
+def analyze_page(pixels, dpi):
+    threshold = otsu_threshold(pixels)
+    ink = pixels <= threshold
+    ink_ratio = float(ink.mean())
+    if ink_ratio < 1e-4 or ink_ratio > 0.5:
+        # Blank page, or a photo / solid fill rather than text on paper
+        return {'dpi': dpi, 'threshold': threshold, 'ink_ratio': ink_ratio,
+                'noise_ratio': 0.0, 'line_height': None, 'skew': 0.0}
+    noise = noise_ratio(ink)
+    if noise > NOISE_RATIO:
+        ink = ndimage.median_filter(ink, size=3)
+    skew = estimate_skew(ink)
+    if abs(skew) >= MIN_SKEW:
+        # Skewed lines smear into each other in the row profile
+        ink = ndimage.rotate(ink, -skew, reshape=False, order=0)
+    return {
+        'dpi': dpi,
+        'threshold': threshold,
+        'ink_ratio': ink_ratio,
+        'noise_ratio': noise,
+        'line_height': text_line_height(ink),
+        'skew': skew,
+    }
+
+
+# Scales the probe DPI so text lines come out line_height pixels tall, clamped to
+# [min_dpi, max_dpi] and rounded up to a multiple of 25. Large print is rasterized at
+# far less than a fixed 300-600 DPI would use; small or noisy print gets more.
+def choose_dpi(analysis, min_dpi, max_dpi, line_height):
+    if analysis['line_height'] is None:
+        return min_dpi if analysis['ink_ratio'] < 1e-4 else max_dpi
+    dpi = analysis['dpi'] * line_height / analysis['line_height']
+    if analysis['noise_ratio'] > NOISE_RATIO:
+        dpi *= 1.25
+    dpi = int(np.ceil(dpi / 25) * 25)
+    return max(min_dpi, min(dpi, max_dpi))
+
+
+# Despeckles, deskews and binarizes a page image for Tesseract
+def preprocess(image, analysis):
+    pixels = to_pixels(image)
+    if analysis['noise_ratio'] > NOISE_RATIO:
+        pixels = ndimage.median_filter(pixels, size=3)
+    if abs(analysis['skew']) >= MIN_SKEW:
+        pixels = ndimage.rotate(pixels, -analysis['skew'], reshape=False, order=1,
+                                mode='constant', cval=255)
+    threshold = otsu_threshold(pixels)
+    return Image.fromarray(np.where(pixels > threshold, 255, 0).astype(np.uint8), 'L')
@@ -0,0 +1,159 @@
+import datetime
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from django.conf import settings
+from django.utils import timezone
+from . import metrics
+from .models import StoredOutput
+from .search_index import delete_output_documents
+
+
+def get_store_folder():
+    return getattr(settings, 'OUTPUT_STORE_FOLDER', None) or os.path.join(
+        settings.PDF_OCR_OUTPUT_FOLDER, 'store')
+
+
+# Blobs are sharded two levels deep on the digest, e.g. ab/cd/abcd....gz, so no
+# directory grows past a few thousand entries
+def blob_path(digest):
+    return os.path.join(get_store_folder(), digest[:2], digest[2:4], digest + '.gz')
+
+
+class _HashingReader:
+    def __init__(self, source):
+        self.source = source
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.source.read(size)
+        self.digest.update(data)
+        self.size += len(data)
+        return data
+
+
+# File-like view of an iterable of byte strings, for put_stream
+class _ChunkReader:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.buffer = b''
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+# Compresses a binary stream into the store and returns (digest, size, stored_size).
+# Identical payloads share one blob.
+def put_stream(source):
+    with metrics.timed('write_output'):
+        return _put_stream(source)
+
+
+def _put_stream(source):
+    folder = get_store_folder()
+    os.makedirs(folder, exist_ok=True)
+    reader = _HashingReader(source)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            with gzip.GzipFile(fileobj=tmp_file, mode='wb', compresslevel=6, mtime=0) as compressed:
+                shutil.copyfileobj(reader, compressed)
+        digest = reader.digest.hexdigest()
+        path = blob_path(digest)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            # Refresh the mtime so garbage collection's grace period covers the new reference
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest, reader.size, os.path.getsize(path)
+
+
+def open_blob(digest):
+    return gzip.open(blob_path(digest), 'rb')
+
+
+def read_blob(digest):
+    with open_blob(digest) as f:
+        return f.read()
+
+
+def save_bytes(user, kind, source_name, data):
+    digest, size, stored_size = put_stream(io.BytesIO(data))
+    return StoredOutput.objects.create(
+        user=user, kind=kind, source_name=source_name, digest=digest,
+        size=size, stored_size=stored_size)
+
+
+# Stores output that is produced piece by piece without holding all of it in memory
+def save_chunks(user, kind, source_name, chunks):
+    digest, size, stored_size = put_stream(_ChunkReader(chunks))
+    return StoredOutput.objects.create(
+        user=user, kind=kind, source_name=source_name, digest=digest,
+        size=size, stored_size=stored_size)
+
+
+# Records another reference to a blob that is already stored, if it still is
+def save_existing(user, kind, source_name, digest):
+    reference = StoredOutput.objects.filter(digest=digest).first()
+    if reference is None or not os.path.exists(blob_path(digest)):
+        return None
+    os.utime(blob_path(digest))
+    return StoredOutput.objects.create(
+        user=user, kind=kind, source_name=source_name, digest=digest,
+        size=reference.size, stored_size=reference.stored_size)
+
+
+# Deletes records older than OUTPUT_RETENTION_DAYS along with their search index
+# documents, then removes blobs that no record references any more. Blobs touched
+# within the grace period are kept, since their record may not be committed yet.
+# Returns (records deleted, blobs removed).
+def collect_garbage(retention_days=None, grace_seconds=3600):
+    if retention_days is None:
+        retention_days = getattr(settings, 'OUTPUT_RETENTION_DAYS', 90)
+    cutoff = timezone.now() - datetime.timedelta(days=retention_days)
+    expired = StoredOutput.objects.filter(created_at__lt=cutoff)
+    records_deleted = 0
+    while True:
+        batch = list(expired.values_list('pk', flat=True)[:1000])
+        if not batch:
+            break
+        StoredOutput.objects.filter(pk__in=batch).delete()
+        delete_output_documents(batch)
+        records_deleted += len(batch)
+    folder = get_store_folder()
+    blobs_removed = 0
+    grace_cutoff = time.time() - grace_seconds
+    for shard in sorted(os.listdir(folder)) if os.path.isdir(folder) else []:
+        shard_path = os.path.join(folder, shard)
+        if len(shard) != 2 or not os.path.isdir(shard_path):
+            continue
+        referenced = set(StoredOutput.objects.filter(
+            digest__startswith=shard).values_list('digest', flat=True))
+        for dirpath, _, filenames in os.walk(shard_path):
+            for name in filenames:
+                digest = name[:-3]
+                path = os.path.join(dirpath, name)
+                if digest in referenced or os.path.getmtime(path) > grace_cutoff:
+                    continue
+                os.remove(path)
+                blobs_removed += 1
+    return records_deleted, blobs_removed
@@ -0,0 +1,110 @@
+import base64
+import json
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+# Returns the cursor's (value, pk) converted to the sort field's and pk's types, or None
+# for a cursor that is malformed or was issued for a different sort
+def decode_cursor(cursor, sort, model):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != 3 or values[0] != sort:
+        return None
+    _, value, pk = values
+    try:
+        value = model._meta.get_field(sort.lstrip('-')).to_python(value)
+        pk = model._meta.pk.to_python(pk)
+    except ValidationError:
+        return None
+    if value is None or pk is None:
+        return None
+    return value, pk
+
+
+class KeysetPage:
+    def __init__(self, request, object_list, sort, page_size, filters, next_cursor):
+        self.request = request
+        self.object_list = object_list
+        self.sort = sort
+        self.page_size = page_size
+        self.filters = filters
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    # Query string for the next page, keeping the current sort, filters and page size
+    def next_query(self):
+        if not self.has_next:
+            return ''
+        query = self.request.GET.copy()
+        query['cursor'] = self.next_cursor
+        return query.urlencode()
+
+    def first_query(self):
+        query = self.request.GET.copy()
+        query.pop('cursor', None)
+        return query.urlencode()
+
+
+def get_page_size(request):
+    default = getattr(settings, 'LIST_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'LIST_MAX_PAGE_SIZE', 500)
+    try:
+        page_size = int(request.GET.get('page_size', default))
+    except ValueError:
+        page_size = default
+    return max(1, min(page_size, maximum))
+
+
+# Cursor pagination: each page seeks past the (sort value, pk) of the previous page's
+# last row, so fetching a page costs the same no matter how deep into the table it is.
+# Cursors carry the sort they were issued for; one that does not match the current
+# sort is ignored and the first page is returned.
+# Only fields listed in sort_fields / filter_fields (all indexed) are honoured.
+# A .values() queryset must include 'id' and every sort field.
+def keyset_paginate(request, queryset, sort_fields, filter_fields=(), default_sort='id'):
+    sort = request.GET.get('sort', default_sort)
+    field = sort.lstrip('-')
+    if field not in sort_fields:
+        sort, field = default_sort, default_sort.lstrip('-')
+    descending = sort.startswith('-')
+
+    filters = {}
+    for name in filter_fields:
+        value = request.GET.get(name)
+        if value:
+            filters[name] = value
+    queryset = queryset.filter(**filters)
+
+    cursor = decode_cursor(request.GET.get('cursor', ''), sort, queryset.model)
+    if cursor is not None:
+        value, pk = cursor
+        op = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'pk__{op}': pk}))
+
+    page_size = get_page_size(request)
+    ordering = (f'-{field}', '-pk') if descending else (field, 'pk')
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor([sort, last[field], last['id']])
+        else:
+            next_cursor = encode_cursor([sort, getattr(last, field), last.pk])
+    return KeysetPage(request, rows, sort, page_size, filters, next_cursor)
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from .forms import CustomUserCreationForm
+from .models import UserProfile
+
+PROFILE_FIELDS = (
+    'cuid', 'date_assigned', 'cash_app_name', 'google_pay_integration',
+    'pay_pal_integration', 'date_of_birth', 'gender', 'sir_name', 'first_name',
+    'middle_name', 'last_name', 'suffix_name', 'language', 'address',
+    'mobile_phone', 'subscription_level', 'date_added'
+)
+
+
+# Algorithm name of an entry in PASSWORD_HASHERS; lets signups use a cheaper
+# (or stronger) hasher than the default without touching login verification
+def get_password_hasher():
+    return getattr(settings, 'REGISTRATION_PASSWORD_HASHER', 'default')
+
+
+# Builds the unsaved User with the password hashed exactly once
+def build_user(cleaned_data, hasher=None):
+    return User(
+        username=cleaned_data['email'],  # Using email as the username
+        email=cleaned_data['email'],
+        first_name=cleaned_data['first_name'],
+        last_name=cleaned_data['last_name'],
+        password=make_password(cleaned_data['password1'], hasher=hasher or get_password_hasher()),
+    )
+
+
+def build_profile(user, cleaned_data):
+    return UserProfile(user=user, **{field: cleaned_data[field] for field in PROFILE_FIELDS})
+
+
+# One transaction with one INSERT for the user and one for the profile
+def register_user(form):
+    with transaction.atomic():
+        user = build_user(form.cleaned_data)
+        user.save()
+        build_profile(user, form.cleaned_data).save(force_insert=True)
+    return user
+
+
+# Validates every row with the signup form, then creates all users and profiles with
+# two bulk INSERTs in one transaction. Nothing is created if any row is invalid.
+def bulk_register_users(rows, hasher=None):
+    forms = []
+    errors = []
+    seen = set()
+    for line, row in enumerate(rows, start=1):
+        form = CustomUserCreationForm(row if isinstance(row, dict) else {})
+        if not form.is_valid():
+            errors.append({'row': line, 'errors': form.errors.get_json_data()})
+        elif form.cleaned_data['email'] in seen:
+            errors.append({'row': line, 'errors': {'email': [
+                {'message': "Duplicate email in this batch.", 'code': 'unique'}]}})
+        else:
+            seen.add(form.cleaned_data['email'])
+            forms.append(form)
+    if errors:
+        return {'created': 0, 'errors': errors}
+
+    existing = set(User.objects.filter(username__in=seen).values_list('username', flat=True))
+    if existing:
+        return {'created': 0, 'errors': [
+            {'email': email, 'errors': {'email': [
+                {'message': "A user with that email already exists.", 'code': 'unique'}]}}
+            for email in sorted(existing)
+        ]}
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([build_user(form.cleaned_data, hasher) for form in forms])
+        if any(user.pk is None for user in users):
+            # Backends that cannot return primary keys from bulk inserts
+            by_username = User.objects.in_bulk(seen, field_name='username')
+            users = [by_username[user.username] for user in users]
+        UserProfile.objects.bulk_create([
+            build_profile(user, form.cleaned_data) for user, form in zip(users, forms)
+        ])
+    return {'created': len(users), 'errors': []}
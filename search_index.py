@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import threading
+import time
+from django.conf import settings
+
+_local = threading.local()
+
+
+def get_index_path():
+    return getattr(settings, 'SEARCH_INDEX_PATH', None) or os.path.join(
+        settings.PDF_OCR_OUTPUT_FOLDER, 'search_index.sqlite3')
+
+
+# One SQLite connection per thread. The owner column holds a "u<id>" token so a
+# per-user search intersects posting lists instead of filtering every match.
+def get_connection():
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        connection = sqlite3.connect(get_index_path(), timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5("
+            "owner, name, body, kind UNINDEXED, ref UNINDEXED, created_at UNINDEXED, "
+            "tokenize='porter unicode61')"
+        )
+        # Which stored output each document was indexed from, so garbage collection
+        # can drop the documents of the outputs it deletes
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS document_outputs '
+            '(output_id INTEGER NOT NULL, document INTEGER NOT NULL)'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS document_outputs_output ON document_outputs (output_id)')
+        _local.connection = connection
+    return connection
+
+
+def _owner(user_id):
+    return f'u{user_id}'
+
+
+def index_document(user_id, kind, name, body, ref='', output_id=None):
+    connection = get_connection()
+    with connection:
+        cursor = connection.execute(
+            'INSERT INTO documents (owner, name, body, kind, ref, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (_owner(user_id), name, body, kind, str(ref), int(time.time()))
+        )
+        if output_id is not None:
+            connection.execute(
+                'INSERT INTO document_outputs (output_id, document) VALUES (?, ?)',
+                (output_id, cursor.lastrowid)
+            )
+
+
+# Removes the documents indexed from the given StoredOutput ids
+def delete_output_documents(output_ids):
+    connection = get_connection()
+    output_ids = list(output_ids)
+    with connection:
+        for start in range(0, len(output_ids), 500):
+            batch = output_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(batch))
+            connection.execute(
+                'DELETE FROM documents WHERE rowid IN (SELECT document FROM document_outputs '
+                f'WHERE output_id IN ({placeholders}))', batch)
+            connection.execute(
+                f'DELETE FROM document_outputs WHERE output_id IN ({placeholders})', batch)
+
+
+# Turns free text into an FTS5 query of quoted terms so user input can never be
+# parsed as FTS syntax
+def build_match(user_id, query):
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    if not terms:
+        return None
+    return f'owner:{_owner(user_id)} AND {{name body}}: ({" AND ".join(terms)})'
+
+
+def search(user_id, query, limit=20):
+    match = build_match(user_id, query)
+    if match is None:
+        return []
+    rows = get_connection().execute(
+        "SELECT name, kind, ref, created_at, snippet(documents, 2, '[', ']', '...', 16), "
+        "bm25(documents, 0.0, 5.0, 1.0) AS rank "
+        "FROM documents WHERE documents MATCH ? ORDER BY rank LIMIT ?",
+        (match, limit)
+    ).fetchall()
+    return [
+        {'name': name, 'kind': kind, 'ref': ref, 'created_at': created_at,
+         'snippet': snippet, 'score': -rank}
+        for name, kind, ref, created_at, snippet, rank in rows
+    ]
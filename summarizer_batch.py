@@ -0,0 +1,89 @@
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from . import metrics
+from .summarizer_engine import get_summarizer_engine
+from .uploads import get_max_upload_size
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+
+def get_batch_workers():
+    return getattr(settings, 'SUMMARIZER_BATCH_WORKERS', None) or os.cpu_count()
+
+
+# Workers come from a forkserver rather than being forked from the web process, which
+# runs request and OCR job threads that may hold locks (e.g. the metrics lock) at fork time
+def get_batch_executor():
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ProcessPoolExecutor(
+                max_workers=get_batch_workers(), mp_context=multiprocessing.get_context('forkserver'))
+        return _batch_executor
+
+
+# Checks the whole batch before anything is read: every upload must be readable and the
+# uploaded files plus the uncompressed members of every .zip archive must fit in
+# MAX_UPLOAD_SIZE together. Raises zipfile.BadZipFile or ValueError.
+def check_documents(uploaded_files):
+    max_size = get_max_upload_size()
+    total = 0
+    for uploaded_file in uploaded_files:
+        if not uploaded_file.name.lower().endswith('.zip'):
+            total += uploaded_file.size
+        else:
+            with zipfile.ZipFile(uploaded_file) as archive:
+                total += sum(info.file_size for info in archive.infolist() if not info.is_dir())
+            uploaded_file.seek(0)
+        if total > max_size:
+            raise ValueError(
+                f"The batch is too large uncompressed. The maximum size is {max_size} bytes.")
+
+
+# Yields (name, bytes) for every uploaded text file and every file inside uploaded .zip
+# archives, one document at a time. Run check_documents first.
+def iter_documents(uploaded_files):
+    for uploaded_file in uploaded_files:
+        if not uploaded_file.name.lower().endswith('.zip'):
+            yield uploaded_file.name, b''.join(uploaded_file.chunks())
+            continue
+        with zipfile.ZipFile(uploaded_file) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, archive.read(info)
+
+
+# Runs inside a worker process, which keeps its own summarizer engine. Metrics recorded
+# there would never reach the parent, so the engine is called without them.
+def _summarize_document(name, data, sentence_count, algorithm):
+    try:
+        results = get_summarizer_engine().summarize(
+            data.decode('utf-8', errors='replace'), sentence_count, algorithm)
+    except Exception as e:
+        return {'name': name, 'error': str(e)}
+    if results is None:
+        return {'name': name, 'error': "Summarization failed."}
+    return {'name': name, 'results': results}
+
+
+# Feeds documents to the worker pool as they are read, with at most two per worker in
+# flight, so only those payloads are held in memory. Results keep the input order.
+def summarize_batch(documents, sentence_count, algorithm='frequency'):
+    executor = get_batch_executor()
+    window = 2 * get_batch_workers()
+    pending = deque()
+    results = []
+    with metrics.timed('summarize_batch'):
+        for name, data in documents:
+            pending.append(executor.submit(_summarize_document, name, data, sentence_count, algorithm))
+            if len(pending) >= window:
+                results.append(pending.popleft().result())
+        while pending:
+            results.append(pending.popleft().result())
+    return results
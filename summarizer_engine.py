@@ -0,0 +1,269 @@
+import heapq
+import re
+import threading
+import time
+from collections import Counter
+from itertools import chain
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+from . import metrics
+
+ALGORITHMS = [
+    ('frequency', 'Word frequency'),
+    ('textrank', 'TextRank'),
+]
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just me more most my myself no nor
+not now of off on once only or other our ours ourselves out over own same she
+should so some such than that the their theirs them themselves then there these
+they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+# Extractive summarizer with no per-request setup; one instance is shared by the process
+class SummarizerEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self):
+        with self._lock:
+            if not self._loaded:
+                self.sentence_re = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+                self.word_re = re.compile(r"[a-z0-9][a-z0-9']*")
+                self.stop_words = STOP_WORDS
+                self._loaded = True
+
+    def split_sentences(self, text):
+        return [s.strip() for s in self.sentence_re.split(text) if s and s.strip()]
+
+    def tokenize(self, sentence):
+        return [w for w in self.word_re.findall(sentence.lower()) if w not in self.stop_words]
+
+    def stream(self, sentence_count, algorithm='frequency'):
+        if not self._loaded:
+            self.load()
+        return StreamingSummary(self, sentence_count, algorithm)
+
+    # Sentence-by-term count matrix and the vocabulary for its columns
+    def term_matrix(self, tokens):
+        vocabulary = {}
+        rows, cols = [], []
+        for row, words in enumerate(tokens):
+            for word in words:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(tokens), len(vocabulary)))
+        matrix.sum_duplicates()
+        return matrix, list(vocabulary)
+
+    # Mean normalized frequency of each sentence's content words. Document-wide
+    # counts can be passed in when only some of the sentences are being ranked.
+    def frequency_scores(self, matrix, vocabulary, frequencies=None, max_frequency=None):
+        if frequencies is None:
+            weights = np.asarray(matrix.sum(axis=0)).ravel()
+        else:
+            weights = np.array([frequencies[word] for word in vocabulary], dtype=float)
+        max_frequency = max_frequency or (weights.max() if weights.size else 0)
+        lengths = np.asarray(matrix.sum(axis=1)).ravel()
+        if not max_frequency:
+            return np.zeros(matrix.shape[0])
+        return matrix @ (weights / max_frequency) / np.maximum(lengths, 1)
+
+    # PageRank over the cosine similarity graph of TF-IDF sentence vectors
+    def textrank_scores(self, matrix, damping=0.85, iterations=100, tolerance=1e-6):
+        count = matrix.shape[0]
+        document_frequency = np.asarray((matrix > 0).sum(axis=0)).ravel()
+        idf = np.log((1 + count) / (1 + document_frequency)) + 1
+        weighted = sparse.csr_matrix(matrix.multiply(idf))
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        weighted = sparse.diags(1 / np.where(norms > 0, norms, 1)) @ weighted
+        similarity = sparse.csr_matrix(weighted @ weighted.T)
+        similarity.setdiag(0)
+        similarity.eliminate_zeros()
+        out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+        dangling = out_weight == 0
+        transition = (sparse.diags(1 / np.where(dangling, 1, out_weight)) @ similarity).T.tocsr()
+        ranks = np.full(count, 1 / count)
+        for _ in range(iterations):
+            updated = (1 - damping) / count + damping * (
+                transition @ ranks + ranks[dangling].sum() / count)
+            if np.abs(updated - ranks).sum() < tolerance:
+                return updated
+            ranks = updated
+        return ranks
+
+    # TextRank's similarity graph grows with the square of the sentence count, so longer
+    # documents are refused with ValueError rather than exhausting memory
+    def score_sentences(self, tokens, algorithm='frequency', frequencies=None, max_frequency=None):
+        if algorithm == 'textrank' and len(tokens) > get_textrank_max_sentences():
+            raise ValueError(
+                f"The textrank algorithm is limited to {get_textrank_max_sentences()} sentences; "
+                f"this text has {len(tokens)}. Use the frequency algorithm instead.")
+        matrix, vocabulary = self.term_matrix(tokens)
+        if algorithm == 'textrank':
+            return self.textrank_scores(matrix)
+        if algorithm != 'frequency':
+            raise ValueError(f"Unknown summarization algorithm: {algorithm}")
+        return self.frequency_scores(matrix, vocabulary, frequencies, max_frequency)
+
+    # Indices of the best sentence_count scores, in document order
+    def select(self, scores, sentence_count):
+        if sentence_count >= len(scores):
+            return list(range(len(scores)))
+        top = np.argpartition(-scores, sentence_count - 1)[:sentence_count]
+        return sorted(top.tolist())
+
+    # Scores every sentence with the chosen algorithm and returns the best
+    # sentence_count of them in document order, as {'sentence_count': n, 'summary':
+    # [sentence, ...]}. This is the result schema summarizer_results.html receives;
+    # it replaces the output of the old Summarizer.main().
+    def summarize(self, text, sentence_count, algorithm='frequency'):
+        if not self._loaded:
+            self.load()
+        sentences = self.split_sentences(text)
+        tokens = [self.tokenize(sentence) for sentence in sentences]
+        if not any(tokens):
+            return None
+        selected = self.select(self.score_sentences(tokens, algorithm), sentence_count)
+        return {
+            'sentence_count': len(selected),
+            'summary': [sentences[i] for i in selected],
+        }
+
+
+# Bounded-memory summary state for text that arrives in chunks. Only the unfinished
+# trailing sentence, the term counts (capped at SUMMARIZER_MAX_TERMS) and a pool of
+# candidate sentences a few times larger than sentence_count are kept. The pool is
+# picked by word frequency, so this only supports the frequency algorithm: TextRank
+# needs the similarity graph of every sentence and is refused with ValueError.
+class StreamingSummary:
+    def __init__(self, engine, sentence_count, algorithm='frequency'):
+        if algorithm != 'frequency':
+            raise ValueError(
+                f"The {algorithm} algorithm needs the whole document and is not available "
+                f"for text over {get_stream_threshold()} characters.")
+        self.engine = engine
+        self.sentence_count = sentence_count
+        self.max_terms = getattr(settings, 'SUMMARIZER_MAX_TERMS', 50000)
+        self.max_sentence_chars = getattr(settings, 'SUMMARIZER_MAX_SENTENCE_CHARS', 10000)
+        self.pool_size = sentence_count * getattr(settings, 'SUMMARIZER_CANDIDATE_FACTOR', 4)
+        self.frequencies = Counter()
+        self.max_frequency = 1
+        self.candidates = []
+        self.buffer = ''
+        self.index = 0
+
+    # Scores a chunk's sentences together with the vectorized frequency scorer and
+    # keeps the best of them and the current pool
+    def _add_sentences(self, sentences):
+        tokens = [self.engine.tokenize(sentence) for sentence in sentences]
+        self.frequencies.update(chain.from_iterable(tokens))
+        if len(self.frequencies) > self.max_terms:
+            self.frequencies = Counter(dict(self.frequencies.most_common(self.max_terms // 2)))
+        self.max_frequency = max(self.frequencies.values(), default=1)
+        matrix, vocabulary = self.engine.term_matrix(tokens)
+        scores = self.engine.frequency_scores(
+            matrix, vocabulary, self.frequencies, self.max_frequency)
+        entries = zip(scores.tolist(), range(self.index, self.index + len(sentences)),
+                      sentences, tokens)
+        self.index += len(sentences)
+        self.candidates = heapq.nlargest(self.pool_size, chain(self.candidates, entries))
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        pieces = self.engine.sentence_re.split(self.buffer)
+        self.buffer = pieces.pop()
+        if len(self.buffer) > self.max_sentence_chars:
+            pieces.append(self.buffer)
+            self.buffer = ''
+        sentences = [piece.strip() for piece in pieces if piece and piece.strip()]
+        if sentences:
+            self._add_sentences(sentences)
+
+    # Ranks the candidate pool against the term counts seen so far
+    def partial(self):
+        if not self.candidates or not self.frequencies:
+            return None
+        candidates = sorted(self.candidates, key=lambda c: c[1])
+        scores = self.engine.score_sentences(
+            [c[3] for c in candidates], 'frequency', self.frequencies, self.max_frequency)
+        selected = self.engine.select(scores, self.sentence_count)
+        return {
+            'sentence_count': len(selected),
+            'summary': [candidates[i][2] for i in selected],
+        }
+
+    def close(self):
+        if self.buffer.strip():
+            self._add_sentences([self.buffer.strip()])
+        self.buffer = ''
+        return self.partial()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_summarizer_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = SummarizerEngine()
+                engine.load()
+                _engine = engine
+    return _engine
+
+
+def summarize(text, sentence_count, algorithm='frequency'):
+    with metrics.timed('summarize'):
+        return get_summarizer_engine().summarize(text, sentence_count, algorithm)
+
+
+def get_stream_threshold():
+    return getattr(settings, 'SUMMARIZER_STREAM_THRESHOLD', 2 * 1024 * 1024)
+
+
+def get_textrank_max_sentences():
+    return getattr(settings, 'SUMMARIZER_TEXTRANK_MAX_SENTENCES', 2000)
+
+
+# Summarizes an iterable of text chunks. Input up to SUMMARIZER_STREAM_THRESHOLD
+# characters is buffered and summarized exactly; only larger input switches to
+# StreamingSummary, whose memory stays flat in the input size but whose result is
+# approximate. Larger input with any algorithm but frequency raises ValueError.
+def summarize_stream(chunks, sentence_count, algorithm='frequency'):
+    engine = get_summarizer_engine()
+    threshold = get_stream_threshold()
+    buffered = []
+    size = 0
+    summary = None
+    # Only time spent summarizing counts; producing the chunks (e.g. OCR) is timed separately
+    seconds = 0.0
+    for chunk in chunks:
+        started = time.perf_counter()
+        if summary is not None:
+            summary.feed(chunk)
+        else:
+            buffered.append(chunk)
+            size += len(chunk)
+            if size > threshold:
+                summary = engine.stream(sentence_count, algorithm)
+                summary.feed(''.join(buffered))
+                buffered = None
+        seconds += time.perf_counter() - started
+    started = time.perf_counter()
+    if summary is None:
+        results = engine.summarize(''.join(buffered), sentence_count, algorithm)
+    else:
+        results = summary.close()
+    metrics.observe_stage('summarize', seconds + time.perf_counter() - started)
+    return results
@@ -0,0 +1,543 @@
+import asyncio
+import base64
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from django.conf import settings as dj_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import bulk_data, metrics, ocr_cache, ocr_jobs, uploads, views
+from .api_fetch import ResponseCache, run_api_fetches
+from .bulk_data import import_rows, iter_export, parse_rows
+from .forms import LineListField, SummarizerBatchForm
+from .models import (
+    APIFetchData, APIFetchResult, AppUserCompany, AppUserDepartment, PdfOcrJob, StoredOutput,
+    UserProfile
+)
+from .middleware import get_user_profile
+from .ocr_jobs import fail_stale_jobs
+from .output_store import collect_garbage, save_bytes
+from .pagination import encode_cursor, keyset_paginate
+from .search_index import index_document, search
+from .summarizer_engine import summarize, summarize_stream
+from .uploads import SPOOL_PREFIX
+
+TEXT = (
+    "The river floods every spring. Farmers plant rice after the river floods. "
+    "The city council met on Tuesday. Rice farmers depend on the spring floods of the river."
+)
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, text in members.items():
+            archive.writestr(name, text)
+    return buffer.getvalue()
+
+
+class SummarizerBatchTests(TestCase):
+    def post(self, *files):
+        return self.client.post(reverse('pdfocrsummarize:summarizer_batch'), {
+            'files': list(files),
+            'sentence_count': 1,
+        })
+
+    def test_summarizes_each_text_file(self):
+        response = self.post(
+            SimpleUploadedFile('a.txt', TEXT.encode()),
+            SimpleUploadedFile('b.txt', TEXT.encode()),
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['name'] for result in results], ['a.txt', 'b.txt'])
+        self.assertEqual(results[0]['results']['sentence_count'], 1)
+
+    def test_summarizes_zip_members(self):
+        archive = make_zip({'docs/one.txt': TEXT, 'docs/two.txt': TEXT})
+        response = self.post(SimpleUploadedFile('docs.zip', archive))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['name'] for result in response.json()['results']],
+                         ['docs/one.txt', 'docs/two.txt'])
+
+    @override_settings(MAX_UPLOAD_SIZE=1024)
+    def test_rejects_oversized_file(self):
+        response = self.post(
+            SimpleUploadedFile('a.txt', TEXT.encode()),
+            SimpleUploadedFile('big.txt', b'x' * 2048),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('files', response.json()['errors'])
+
+    @override_settings(MAX_UPLOAD_SIZE=1024)
+    def test_rejects_zip_over_total_uncompressed_size(self):
+        # Each member compresses well under the limit but together they expand past it
+        archive = make_zip({f'{i}.txt': 'x' * 400 for i in range(4)})
+        self.assertLess(len(archive), 1024)
+        response = self.post(SimpleUploadedFile('docs.zip', archive))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('too large', response.json()['errors']['files'][0]['message'])
+
+    def test_rejects_invalid_zip(self):
+        response = self.post(SimpleUploadedFile('docs.zip', b'not a zip'))
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MAX_UPLOAD_SIZE=1024)
+class UploadLimitTests(TestCase):
+    def setUp(self):
+        settings = override_settings(
+            MIDDLEWARE=['pdfocrsummarize.middleware.UploadLimitMiddleware'] + dj_settings.MIDDLEWARE)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    # Returns the response and the view's form class, to tell whether the view ran
+    def post(self, data):
+        with mock.patch.object(views, 'SummarizerBatchForm', wraps=SummarizerBatchForm) as form:
+            response = self.client.post(reverse('pdfocrsummarize:summarizer_batch'), {
+                'files': [SimpleUploadedFile('a.txt', data)], 'sentence_count': 1})
+        return response, form
+
+    def test_oversized_content_length_is_refused(self):
+        response, form = self.post(b'x' * 2048)
+        self.assertEqual(response.status_code, 413)
+        form.assert_not_called()
+
+    def test_upload_growing_past_the_limit_is_stopped_before_the_view(self):
+        # A body that passes the Content-Length check but overflows while streaming
+        with mock.patch.object(uploads, 'get_max_upload_size', return_value=16):
+            response, form = self.post(b'x' * 512)
+        self.assertEqual(response.status_code, 413)
+        form.assert_not_called()
+
+    def test_small_upload_reaches_the_view(self):
+        response, form = self.post(TEXT.encode())
+        self.assertEqual(response.status_code, 200)
+        form.assert_called_once()
+
+
+class SummarizeStreamTests(SimpleTestCase):
+    def chunks(self, text, size=7):
+        return (text[i:i + size] for i in range(0, len(text), size))
+
+    def test_small_input_is_summarized_exactly(self):
+        for algorithm in ('frequency', 'textrank'):
+            self.assertEqual(summarize_stream(self.chunks(TEXT), 2, algorithm),
+                             summarize(TEXT, 2, algorithm))
+
+    @override_settings(SUMMARIZER_STREAM_THRESHOLD=20)
+    def test_large_input_is_streamed(self):
+        results = summarize_stream(self.chunks(TEXT), 1)
+        self.assertEqual(results['sentence_count'], 1)
+        self.assertIn(results['summary'][0], TEXT)
+
+    @override_settings(SUMMARIZER_STREAM_THRESHOLD=20)
+    def test_textrank_is_refused_for_streamed_input(self):
+        with self.assertRaises(ValueError):
+            summarize_stream(self.chunks(TEXT), 1, 'textrank')
+
+    @override_settings(SUMMARIZER_TEXTRANK_MAX_SENTENCES=3)
+    def test_textrank_is_refused_over_the_sentence_limit(self):
+        with self.assertRaises(ValueError):
+            summarize(TEXT, 1, 'textrank')
+        self.assertEqual(summarize(TEXT, 1)['sentence_count'], 1)
+
+
+class KeysetPaginateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('tenant')
+        AppUserCompany.objects.bulk_create(
+            AppUserCompany(client_uid=cls.user, parent_company_name=f'Company {i:02}',
+                           email=f'{i}@example.com', address='', website='')
+            for i in range(5))
+
+    def paginate(self, **params):
+        request = RequestFactory().get('/', {'page_size': 2, **params})
+        return keyset_paginate(
+            request, AppUserCompany.objects.filter(client_uid=self.user),
+            sort_fields=('id', 'parent_company_name', 'email'))
+
+    def names(self, page):
+        return [company.parent_company_name for company in page]
+
+    def test_follows_cursor(self):
+        page = self.paginate(sort='-parent_company_name')
+        self.assertEqual(self.names(page), ['Company 04', 'Company 03'])
+        page = self.paginate(sort='-parent_company_name', cursor=page.next_cursor)
+        self.assertEqual(self.names(page), ['Company 02', 'Company 01'])
+
+    def test_ignores_cursor_from_another_sort(self):
+        cursor = self.paginate(sort='parent_company_name').next_cursor
+        page = self.paginate(sort='id', cursor=cursor)
+        self.assertEqual(self.names(page), ['Company 00', 'Company 01'])
+
+    def test_ignores_cursor_with_bad_types(self):
+        for cursor in (encode_cursor(['id', 'Company 01', 2]), encode_cursor(['id', 1, 'x']),
+                       base64.urlsafe_b64encode(json.dumps([1, 2]).encode()).decode(), '!!'):
+            self.assertEqual(self.names(self.paginate(cursor=cursor)), ['Company 00', 'Company 01'])
+
+
+class TenantScopingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.other = User.objects.create_user('other')
+        cls.company = AppUserCompany.objects.create(
+            client_uid=cls.owner, parent_company_name='Owned', email='owned@example.com',
+            address='', website='')
+        cls.api = APIFetchData.objects.create(client_uid=cls.owner, api_name='Owned API')
+
+    def setUp(self):
+        self.client.force_login(self.other)
+
+    def test_update_and_delete_of_another_tenants_row_are_not_found(self):
+        for name, pk in (('appusercompany', self.company.pk), ('apifetchdata', self.api.pk)):
+            for action in ('update', 'delete'):
+                url = reverse(f'pdfocrsummarize:{name}_{action}', args=[pk])
+                self.assertEqual(self.client.get(url).status_code, 404)
+                self.assertEqual(self.client.post(url, {'api_name': 'Taken'}).status_code, 404)
+        self.assertTrue(AppUserCompany.objects.filter(pk=self.company.pk).exists())
+        self.assertEqual(APIFetchData.objects.get(pk=self.api.pk).api_name, 'Owned API')
+
+    def test_list_and_export_only_show_own_rows(self):
+        APIFetchData.objects.create(client_uid=self.other, api_name='Mine')
+        response = self.client.get(reverse('pdfocrsummarize:apifetchdata_api'), {'fields': 'api_name'})
+        results = json.loads(b''.join(response.streaming_content))['results']
+        self.assertEqual([row['api_name'] for row in results], ['Mine'])
+        response = self.client.get(reverse('pdfocrsummarize:appusercompany_export'))
+        self.assertNotIn(b'Owned', b''.join(response.streaming_content))
+
+    def test_bulk_actions_skip_another_tenants_rows(self):
+        url = reverse('pdfocrsummarize:appusercompany_bulk')
+        self.client.post(url, {'ids': [self.company.pk], 'action': 'update', 'address': 'Taken'})
+        self.client.post(url, {'ids': [self.company.pk], 'action': 'delete'})
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.address, '')
+
+
+class BulkDataTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.source = User.objects.create_user('source')
+        cls.target = User.objects.create_user('target')
+        for i in range(3):
+            AppUserDepartment.objects.create(
+                client_uid=cls.source, department=f'Department {i}', app_company_name='Acme',
+                sub_ints=['Cables', '', f'Doors {i}'])
+
+    def departments(self, user):
+        return list(AppUserDepartment.objects.filter(client_uid=user).order_by('pk').values_list(
+            'department', 'app_company_name', 'sub_ints'))
+
+    def round_trip(self, fmt):
+        exported = ''.join(iter_export('departments', self.source, fmt)).encode('utf-8')
+        rows = [{k: v for k, v in row.items() if k != 'id'}
+                for row in parse_rows(io.BytesIO(exported), fmt)]
+        return import_rows('departments', rows, self.target, batch_size=2)
+
+    def test_export_import_round_trip(self):
+        for fmt in ('csv', 'json'):
+            with self.subTest(fmt=fmt):
+                AppUserDepartment.objects.filter(client_uid=self.target).delete()
+                self.assertEqual(self.round_trip(fmt)['created'], 3)
+                self.assertEqual(self.departments(self.target), self.departments(self.source))
+
+    def test_invalid_row_rolls_back_the_whole_import(self):
+        rows = [{'department': f'New {i}', 'app_company_name': 'Acme'} for i in range(3)]
+        rows[2]['department'] = ''
+        result = import_rows('departments', rows, self.target, batch_size=2)
+        self.assertEqual((result['created'], [error['row'] for error in result['errors']]), (0, [3]))
+        self.assertEqual(self.departments(self.target), [])
+
+    @override_settings(BULK_IMPORT_MAX_ERRORS=2)
+    def test_stops_after_max_errors(self):
+        def rows():
+            for i in range(1000):
+                consumed.append(i)
+                yield {'department': ''}
+        consumed = []
+        result = import_rows('departments', rows(), self.target)
+        self.assertTrue(result['error_limit_reached'])
+        self.assertEqual(len(result['errors']), 2)
+        self.assertLess(len(consumed), 5)
+
+    def test_parses_json_incrementally_and_json_lines(self):
+        rows = [{'department': 'A', 'sub_ints': ['x', 'y']}, {'department': 'B [1], {2}'}, 7]
+        text = json.dumps(rows, indent=1)
+        self.assertEqual(list(bulk_data._iter_json_array(io.StringIO(text), chunk_size=5)), rows)
+        lines = '\n'.join(json.dumps(row) for row in rows).encode('utf-8')
+        self.assertEqual(list(parse_rows(io.BytesIO(lines), 'jsonl')), rows)
+        for bad in ('{"department": "A"}', '[{"department": "A"}', '[{"a": 1} {"b": 2}]'):
+            with self.assertRaises(ValueError):
+                list(bulk_data._iter_json_array(io.StringIO(bad), chunk_size=5))
+
+
+class LineListFieldTests(SimpleTestCase):
+    def test_keeps_positions_and_drops_trailing_blank_lines(self):
+        self.assertEqual(LineListField().clean('a\n\n c \n\n'), ['a', '', 'c'])
+
+    def test_rejects_more_than_twenty_lines(self):
+        with self.assertRaises(ValidationError):
+            LineListField().clean('\n'.join(str(i) for i in range(21)))
+
+    def test_get_sub_ints_returns_twenty_values(self):
+        sub_ints = AppUserDepartment(sub_ints=['a', '', 'c']).get_sub_ints()
+        self.assertEqual(len(sub_ints), 20)
+        self.assertEqual(sub_ints[:4], ['a', '', 'c', ''])
+
+
+# aiohttp test server on its own event loop thread, since run_api_fetches starts and
+# stops an event loop of its own
+class ThreadedTestServer:
+    def __init__(self, routes):
+        app = web.Application()
+        app.add_routes(routes)
+        self.server = TestServer(app, host='127.0.0.1')
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(10)
+
+    def start(self):
+        self.thread.start()
+        self.run(self.server.start_server())
+
+    def stop(self):
+        self.run(self.server.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def url(self, path):
+        return str(self.server.make_url(path))
+
+
+class RunAPIFetchesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('fetcher')
+        self.hits = {'flaky': 0}
+        self.limited_at = []
+        self.server = ThreadedTestServer([
+            web.get('/flaky', self.flaky),
+            web.get('/limited/{n}', self.limited),
+            web.get('/etag', self.etag),
+        ])
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(cache.clear)
+
+    async def flaky(self, request):
+        self.hits['flaky'] += 1
+        if self.hits['flaky'] == 1:
+            return web.Response(status=503, headers={'Retry-After': '3600'})
+        return web.Response(text='ok')
+
+    async def etag(self, request):
+        self.hits['etag'] = self.hits.get('etag', 0) + 1
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        return web.Response(text='body', headers={'ETag': '"v1"'})
+
+    async def limited(self, request):
+        self.limited_at.append(time.monotonic())
+        return web.Response(text=request.match_info['n'])
+
+    def api(self, path, **fields):
+        return APIFetchData.objects.create(
+            client_uid=self.user, api_name=path, addapi_url=self.server.url(path), **fields)
+
+    @override_settings(API_FETCH_MAX_RETRY_AFTER=0.05)
+    def test_retries_with_capped_retry_after_and_saves_result(self):
+        api = self.api('/flaky', addapi_max_attempts=3)
+        started = time.monotonic()
+        run_api_fetches([api], cache=None)
+        self.assertLess(time.monotonic() - started, 5)
+        result = APIFetchResult.objects.get(api=api)
+        self.assertEqual((result.status_code, result.body, result.attempts), (200, 'ok', 2))
+
+    def test_rate_limit_is_shared_per_host(self):
+        for i in range(4):
+            self.api(f'/limited/{i}', addapi_max_per_unit='2/s')
+        # Batches of 3 from a queryset: the rate limit carries over to the second batch
+        run_api_fetches(APIFetchData.objects.order_by('pk'), cache=None, batch_size=3)
+        # A bucket of 2 tokens refilled at 2/s: two requests at once, then one every 0.5s
+        self.assertEqual(len(self.limited_at), 4)
+        self.assertGreaterEqual(max(self.limited_at) - min(self.limited_at), 0.9)
+        self.assertEqual(
+            sorted(APIFetchResult.objects.values_list('body', flat=True)), ['0', '1', '2', '3'])
+
+    def test_cache_carries_over_between_runs(self):
+        api = self.api('/etag')
+        run_api_fetches([api], cache=ResponseCache(ttl=60))
+        run_api_fetches([api], cache=ResponseCache(ttl=60))
+        self.assertEqual(self.hits['etag'], 1)
+        self.assertEqual(
+            list(APIFetchResult.objects.order_by('pk').values_list('body', 'from_cache')),
+            [('body', False), ('body', True)])
+
+    def test_stale_entry_is_revalidated_in_a_later_run(self):
+        api = self.api('/etag')
+        run_api_fetches([api], cache=ResponseCache(ttl=0))
+        self.assertEqual(run_api_fetches([api], cache=ResponseCache(ttl=0)), (1, 0))
+        result = APIFetchResult.objects.latest('pk')
+        self.assertEqual(self.hits['etag'], 2)
+        self.assertEqual((result.status_code, result.body, result.from_cache), (200, 'body', True))
+
+
+class CollectGarbageTests(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        settings = override_settings(
+            PDF_OCR_OUTPUT_FOLDER=folder.name,
+            SEARCH_INDEX_PATH=f'{folder.name}/search_index-{self.id()}.sqlite3')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = User.objects.create_user('collector')
+
+    def test_retention_days_zero_deletes_outputs_and_their_documents(self):
+        stored = save_bytes(self.user, StoredOutput.KIND_SUMMARY, 'notes.txt', b'river floods')
+        index_document(self.user.pk, 'summary', 'notes.txt', 'river floods', stored.digest, stored.pk)
+        index_document(self.user.pk, 'summary', 'batch.txt', 'river floods')
+        self.assertEqual(len(search(self.user.pk, 'river')), 2)
+        self.assertEqual(collect_garbage(retention_days=0, grace_seconds=0), (1, 1))
+        self.assertFalse(StoredOutput.objects.exists())
+        self.assertEqual([result['name'] for result in search(self.user.pk, 'river')], ['batch.txt'])
+
+
+class FailStaleJobsTests(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        settings = override_settings(UPLOAD_SPOOL_FOLDER=folder.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.folder = folder.name
+
+    def spool(self, name, age):
+        path = os.path.join(self.folder, name)
+        with open(path, 'wb') as f:
+            f.write(b'%PDF')
+        os.utime(path, (time.time() - age, time.time() - age))
+        return path
+
+    def test_fails_stale_jobs_and_removes_their_spooled_uploads(self):
+        stale = PdfOcrJob.objects.create(file_name='stale.pdf')
+        PdfOcrJob.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(hours=3))
+        fresh = PdfOcrJob.objects.create(file_name='fresh.pdf')
+        old_spool = self.spool(SPOOL_PREFIX + 'old.pdf', 3 * 60 * 60)
+        new_spool = self.spool(SPOOL_PREFIX + 'new.pdf', 0)
+        unrelated = self.spool('other.pdf', 3 * 60 * 60)
+        self.assertEqual(fail_stale_jobs(2 * 60 * 60), (1, 1))
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual((stale.status, fresh.status), (PdfOcrJob.STATUS_FAILED, PdfOcrJob.STATUS_QUEUED))
+        self.assertEqual([os.path.exists(p) for p in (old_spool, new_spool, unrelated)],
+                         [False, True, True])
+
+
+class PdfOcrViewTests(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        settings = override_settings(
+            PDF_OCR_OUTPUT_FOLDER=folder.name, UPLOAD_SPOOL_FOLDER=folder.name,
+            SEARCH_INDEX_PATH=f'{folder.name}/search_index.sqlite3')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_requires_login(self):
+        response = self.client.post(reverse('pdfocrsummarize:pdf_ocr'))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(PdfOcrJob.objects.exists())
+
+    def test_passes_tesseract_options_to_the_job(self):
+        self.client.force_login(User.objects.create_user('uploader'))
+        with mock.patch.object(ocr_jobs, 'get_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('pdfocrsummarize:pdf_ocr'), {
+                    'file': SimpleUploadedFile('scan.pdf', b'%PDF'), 'dpi': 300, 'psm': 6, 'oem': 1})
+        options = get_executor().submit.call_args.args[-1]
+        self.assertEqual((options['dpi'], options['psm'], options['oem']), (300, 6, 1))
+
+
+class UserProfileCacheTests(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.user = User.objects.create_user('subscriber')
+        self.profile = UserProfile.objects.create(
+            user=self.user, date_of_birth=date(2000, 1, 1), subscription_level='free')
+        settings = override_settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'profiles': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                             'LOCATION': folder.name},
+            },
+            USER_PROFILE_CACHE='profiles')
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_cached_profile_costs_no_queries(self):
+        get_user_profile(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_profile(self.user).subscription_level, 'free')
+
+    def test_save_and_delete_invalidate_the_cached_profile(self):
+        get_user_profile(self.user)
+        self.profile.subscription_level = 'executive'
+        self.profile.save()
+        self.assertEqual(get_user_profile(self.user).subscription_level, 'executive')
+        self.profile.delete()
+        self.assertIsNone(get_user_profile(self.user))
+
+    def test_process_local_cache_is_not_used_across_requests(self):
+        with override_settings(USER_PROFILE_CACHE='default'):
+            get_user_profile(self.user)
+            with self.assertNumQueries(1):
+                get_user_profile(self.user)
+
+
+class OcrCacheEvictionTests(SimpleTestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        settings = override_settings(PDF_OCR_CACHE_FOLDER=folder.name, PDF_OCR_CACHE_MAX_BYTES=10)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_evicts_at_most_once_per_interval(self):
+        ocr_cache.put_page_text('a' * 64, 'x' * 8)
+        ocr_cache.put_page_text('b' * 64, 'x' * 8)
+        self.assertTrue(ocr_cache.maybe_evict())
+        self.assertIsNone(ocr_cache.get_page_text('a' * 64))
+        self.assertEqual(ocr_cache.get_page_text('b' * 64), 'x' * 8)
+        ocr_cache.put_page_text('c' * 64, 'x' * 8)
+        self.assertFalse(ocr_cache.maybe_evict())
+        self.assertEqual(ocr_cache.get_page_text('b' * 64), 'x' * 8)
+
+
+class MetricsTests(SimpleTestCase):
+    def test_every_recorded_metric_has_help_text(self):
+        metrics.inc('pdfocrsummarize_cache_requests_total', {'cache': 'api_response', 'result': 'hit'})
+        metrics.observe_stage('summarize', 0.01)
+        rendered = metrics.render()
+        for name in ('pdfocrsummarize_cache_requests_total', 'pdfocrsummarize_stage_seconds'):
+            self.assertIn(f'# HELP {name} ', rendered)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from . import metrics
+
+
+def get_max_upload_size():
+    return getattr(settings, 'MAX_UPLOAD_SIZE', 512 * 1024 * 1024)
+
+
+# Stops reading a multipart body once it passes MAX_UPLOAD_SIZE, before the rest is
+# received or written to disk. Requests without a trustworthy Content-Length are
+# counted as they arrive. UploadLimitMiddleware installs it on every request.
+class MaxUploadSizeHandler(FileUploadHandler):
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.received = 0
+        if content_length and content_length > get_max_upload_size():
+            self.request.upload_too_large = True
+
+    def new_file(self, *args, **kwargs):
+        if getattr(self.request, 'upload_too_large', False):
+            raise StopUpload(connection_reset=True)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > get_max_upload_size():
+            self.request.upload_too_large = True
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+# Spooled uploads carry this prefix so stale ones can be told apart from other files in
+# a shared temporary folder
+SPOOL_PREFIX = 'pdfocrsummarize-'
+
+
+def get_spool_folder():
+    return getattr(settings, 'UPLOAD_SPOOL_FOLDER', None) or tempfile.gettempdir()
+
+
+# Removes spooled uploads older than max_age seconds, left behind by jobs whose worker
+# process exited before they finished. Returns the number of files removed.
+def remove_stale_spool_files(max_age):
+    removed = 0
+    cutoff = time.time() - max_age
+    with os.scandir(get_spool_folder()) as entries:
+        for entry in entries:
+            if not entry.name.startswith(SPOOL_PREFIX) or not entry.is_file(follow_symlinks=False):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+
+# Places the upload in the spool folder exactly once and returns (path, sha256 hex digest).
+# Uploads Django already streamed to disk are hard-linked rather than copied.
+def spool_upload(uploaded_file):
+    with metrics.timed('upload_spool'):
+        return _spool_upload(uploaded_file)
+
+
+def _spool_upload(uploaded_file):
+    spool_dir = get_spool_folder()
+    spool_path = os.path.join(
+        spool_dir, SPOOL_PREFIX + uuid.uuid4().hex + os.path.splitext(uploaded_file.name)[1])
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        try:
+            os.link(uploaded_file.temporary_file_path(), spool_path)
+        except OSError:
+            with open(uploaded_file.temporary_file_path(), 'rb') as source, \
+                    open(spool_path, 'wb') as spool_file:
+                shutil.copyfileobj(source, spool_file)
+        with open(spool_path, 'rb') as spool_file:
+            return spool_path, hashlib.file_digest(spool_file, 'sha256').hexdigest()
+    digest = hashlib.sha256()
+    with open(spool_path, 'wb') as spool_file:
+        for chunk in uploaded_file.chunks():
+            digest.update(chunk)
+            spool_file.write(chunk)
+    return spool_path, digest.hexdigest()
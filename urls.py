@@ -4,8 +4,14 @@ from django.views.generic import TemplateView
 from .views import (
     index,
     pdf_ocr,
+    pdf_ocr_job_status,
+    PdfOcrSummarizerView,
     SummarizerView,
+    summarizer_batch,
     register,
+    register_bulk,
+    search_documents,
+    metrics_view,
     login_view,
     appusercompany_list,
     appusercompany_create,
@@ -22,7 +28,11 @@ from .views import (
     apifetchdata_list,
     apifetchdata_create,
     apifetchdata_update,
-    apifetchdata_delete
+    apifetchdata_delete,
+    apifetchdata_api,
+    table_import,
+    table_export,
+    table_bulk
 )
 # Import Django's built-in LogoutView
 from django.contrib.auth.views import LogoutView
@@ -32,11 +42,21 @@ app_name = 'pdfocrsummarize'
 urlpatterns = [
     path('index/', index, name='index'),  # Home page
     path('pdf_ocr/', pdf_ocr, name='pdf_ocr'),  # PDF OCR page
+    path('pdf_ocr/jobs/<uuid:job_id>/', pdf_ocr_job_status,
+         name='pdf_ocr_job_status'),  # PDF OCR job status
+    path('pdf_ocr/summarize/', PdfOcrSummarizerView.as_view(),
+         name='pdf_ocr_summarizer'),  # PDF OCR straight into the summarizer
     path('summarizer/', SummarizerView.as_view(),
          name='summarizer'),  # Summarizer page
+    path('summarizer/batch/', summarizer_batch,
+         name='summarizer_batch'),  # Batch summarizer endpoint
     path('summarizer/results/', TemplateView.as_view(template_name='summarizer_results.html'),
          name='summarizer_results'),  # Results page
+    path('search/', search_documents, name='search'),  # Full-text search
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus metrics
     path('register/', register, name='register'),  # Registration page
+    path('register/bulk/', register_bulk,
+         name='register_bulk'),  # Bulk user provisioning
     path('login/', login_view, name='login'),  # Login page
     path('logout/', LogoutView.as_view(next_page='pdfocrsummarize:login'), name='logout'),
 
@@ -48,6 +68,13 @@ urlpatterns = [
          name='appusercompany_update'),
     path('companies/<pk>/delete/', appusercompany_delete,
          name='appusercompany_delete'),
+    path('companies/import/', table_import, {'table': 'companies'},
+         name='appusercompany_import'),
+    path('companies/export/', table_export, {'table': 'companies'},
+         name='appusercompany_export'),
+    path('companies/bulk/', table_bulk,
+         {'table': 'companies', 'list_url': 'pdfocrsummarize:appusercompany_list'},
+         name='appusercompany_bulk'),
 
     # AppUserDepartment URLs
     path('departments/', appuserdepartment_list, name='appuserdepartment_list'),
@@ -57,6 +84,13 @@ urlpatterns = [
          name='appuserdepartment_update'),
     path('departments/<pk>/delete/', appuserdepartment_delete,
          name='appuserdepartment_delete'),
+    path('departments/import/', table_import, {'table': 'departments'},
+         name='appuserdepartment_import'),
+    path('departments/export/', table_export, {'table': 'departments'},
+         name='appuserdepartment_export'),
+    path('departments/bulk/', table_bulk,
+         {'table': 'departments', 'list_url': 'pdfocrsummarize:appuserdepartment_list'},
+         name='appuserdepartment_bulk'),
 
     # AppUserGSText URLs
     path('gstexts/', appusergstext_list, name='appusergstext_list'),
@@ -65,10 +99,25 @@ urlpatterns = [
          name='appusergstext_update'),
     path('gstexts/<pk>/delete/', appusergstext_delete,
          name='appusergstext_delete'),
+    path('gstexts/import/', table_import, {'table': 'gstexts'},
+         name='appusergstext_import'),
+    path('gstexts/export/', table_export, {'table': 'gstexts'},
+         name='appusergstext_export'),
+    path('gstexts/bulk/', table_bulk,
+         {'table': 'gstexts', 'list_url': 'pdfocrsummarize:appusergstext_list'},
+         name='appusergstext_bulk'),
 
     # APIFetchData URLs
     path('apidata/', apifetchdata_list, name='apifetchdata_list'),
     path('apidata/create/', apifetchdata_create, name='apifetchdata_create'),
     path('apidata/<pk>/update/', apifetchdata_update, name='apifetchdata_update'),
     path('apidata/<pk>/delete/', apifetchdata_delete, name='apifetchdata_delete'),
+    path('apidata/import/', table_import, {'table': 'apidata'},
+         name='apifetchdata_import'),
+    path('apidata/export/', table_export, {'table': 'apidata'},
+         name='apifetchdata_export'),
+    path('apidata/bulk/', table_bulk,
+         {'table': 'apidata', 'list_url': 'pdfocrsummarize:apifetchdata_list'},
+         name='apifetchdata_bulk'),
+    path('api/apidata/', apifetchdata_api, name='apifetchdata_api'),
 ]
@@ -1,31 +1,57 @@
-import os
+import codecs
+import csv
+import hashlib
+import hmac
+import json
 import pytesseract
-import tempfile
+import zipfile
 from django.conf import settings
-from django.shortcuts import render, redirect
-from django.http import HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 # Import the user form
 from .forms import (
     PdfForm,
     SummarizerForm,
+    SummarizerBatchForm,
+    PdfSummarizerForm,
     CustomUserCreationForm,
     LoginForm,
     AppUserCompanyForm,
     AppUserDepartmentForm,
     AppUserGSTextForm,
-    APIFetchDataForm
+    APIFetchDataForm,
+    BulkImportForm
 )
-from .pdf_ocr import pdf_ocr_process
+from .bulk_data import (
+    bulk_delete_rows,
+    bulk_update_rows,
+    get_format,
+    import_rows,
+    iter_export,
+    parse_rows
+)
+from .ocr_jobs import enqueue_pdf_ocr
+from .output_store import save_bytes
+from .pagination import keyset_paginate
+from .registration import bulk_register_users, register_user
+from . import metrics
+from .search_index import index_document, search
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views.generic import View
-from .summarizer import Summarizer
+from .summarizer_engine import summarize_stream
+from .summarizer_batch import check_documents, iter_documents, summarize_batch
 from django.views.generic import FormView
-import datetime
 from django.contrib.auth import login
-from .models import UserProfile, AppUserCompany, AppUserDepartment, AppUserGSText, APIFetchData
+from .models import AppUserCompany, AppUserDepartment, AppUserGSText, APIFetchData, PdfOcrJob, StoredOutput
 from django.contrib.auth import authenticate, login as auth_login
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.admin.views.decorators import staff_member_required
 
 
 # Index is just to test that the Django WebServer is live
@@ -36,17 +62,24 @@ def index(request):
         return HttpResponse("Invalid request method")
 
 
-# This view facilitates the PDF Text and Image Extraction
+# This view facilitates the PDF Text and Image Extraction. Jobs belong to the uploader,
+# since only they can read the job's status and result.
+@login_required
 def pdf_ocr(request):
     if request.method == 'POST':
         form = PdfForm(request.POST, request.FILES)
         if form.is_valid():
             try:
-                output_filename = pdf_ocr_process(request.FILES['file'])
-                output_dir = settings.PDF_OCR_OUTPUT_FOLDER
-                messages.success(
-                    request, f"File processed successfully. Output saved to: {os.path.join(output_dir, output_filename)}"
-                )
+                job = enqueue_pdf_ocr(
+                    request.FILES['file'], request.user, **form.get_ocr_options())
+                if job.status == PdfOcrJob.STATUS_DONE:
+                    messages.success(
+                        request, f"File processed successfully. Output saved to: {job.output.path}"
+                    )
+                else:
+                    messages.success(
+                        request, f"File queued for processing. Job ID: {job.pk}"
+                    )
                 return redirect('pdfocrsummarize:pdf_ocr')
             except Exception as e:
                 with open(settings.PDF_OCR_ERROR_LOG_PATH, 'a') as f:
@@ -58,6 +91,36 @@ def pdf_ocr(request):
     return render(request, 'pdfocrsummarize/pdf_ocr.html', {'form': form})
 
 
+# Status and result of one of the user's queued PDF OCR jobs
+@login_required
+def pdf_ocr_job_status(request, job_id):
+    if request.method != 'GET':
+        return HttpResponse("Invalid request method")
+    job = get_object_or_404(
+        PdfOcrJob.objects.select_related('output', 'summary'), pk=job_id, user=request.user)
+    data = {
+        'job_id': str(job.pk),
+        'file_name': job.file_name,
+        'status': job.status,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+    if job.status == PdfOcrJob.STATUS_DONE and job.output is not None:
+        data['output_path'] = job.output.path
+        data['output_digest'] = job.output.digest
+        if job.summary is not None:
+            data['summary'] = json.loads(job.summary.read())
+    elif job.status == PdfOcrJob.STATUS_FAILED:
+        data['error'] = job.error
+    return JsonResponse(data)
+
+
+# Adds a summary to the user's search index; anonymous results are not indexed
+def index_summary(user, name, results, ref='', output_id=None):
+    if user.is_authenticated:
+        index_document(user.pk, 'summary', name, ' '.join(results['summary']), ref, output_id)
+
+
 # Summarizer View
 class SummarizerView(FormView):
     template_name = 'pdfocrsummarize/summarizer.html'
@@ -67,62 +130,85 @@ class SummarizerView(FormView):
     def form_valid(self, form):
         text_file = form.cleaned_data['text_file']
         sentence_count = form.cleaned_data['sentence_count']
-        with tempfile.TemporaryDirectory() as tmpdir:
-            tmp_file_path = f"{tmpdir}/{text_file.name}"
-            with open(tmp_file_path, 'wb') as tmp_file:
-                for chunk in text_file.chunks():
-                    tmp_file.write(chunk)
-            summarizer = Summarizer(tmp_file_path, sentence_count)
-            results = summarizer.main()
-            if results is not None:
-                current_datetime = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_file_path = os.path.join(
-                    settings.PDF_OCR_OUTPUT_FOLDER,
-                    f"{text_file.name}_{current_datetime}_summarized.txt"
-                )
-                with open(output_file_path, 'w') as output_file:
-                    import json
-                    json.dump(results, output_file, indent=4)
-                messages.success(
-                    self.request, f"Summarized text saved to: {output_file_path}"
-                )
-                return render(self.request, self.success_template_name, {'results': results})
-            else:
-                messages.error(self.request, "Summarization failed.")
-                return render(self.request, self.template_name, {'form': form})
+        algorithm = form.cleaned_data['algorithm'] or 'frequency'
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        try:
+            results = summarize_stream(
+                (decoder.decode(chunk) for chunk in text_file.chunks()), sentence_count, algorithm)
+        except ValueError as e:
+            messages.error(self.request, str(e))
+            return render(self.request, self.template_name, {'form': form})
+        if results is not None:
+            stored = save_bytes(
+                self.request.user if self.request.user.is_authenticated else None,
+                StoredOutput.KIND_SUMMARY, text_file.name,
+                json.dumps(results, separators=(',', ':')).encode('utf-8'))
+            index_summary(self.request.user, text_file.name, results, stored.digest, stored.pk)
+            messages.success(
+                self.request, f"Summarized text saved to: {stored.path}"
+            )
+            return render(self.request, self.success_template_name, {'results': results})
+        else:
+            messages.error(self.request, "Summarization failed.")
+            return render(self.request, self.template_name, {'form': form})
+
+    def form_invalid(self, form):
+        messages.error(self.request, "Invalid form data.")
+        return render(self.request, self.template_name, {'form': form})
+
+
+# Queues a PDF for OCR followed by summarization. The summary is served by the job
+# status view, which only shows jobs to their owner, so this view needs a login.
+class PdfOcrSummarizerView(LoginRequiredMixin, FormView):
+    template_name = 'pdfocrsummarize/pdf_ocr_summarizer.html'
+    form_class = PdfSummarizerForm
+
+    def form_valid(self, form):
+        try:
+            job = enqueue_pdf_ocr(
+                form.cleaned_data['file'], self.request.user,
+                summary_sentence_count=form.cleaned_data['sentence_count'],
+                summary_algorithm=form.cleaned_data['algorithm'] or 'frequency',
+                **form.get_ocr_options())
+        except Exception as e:
+            with open(settings.PDF_OCR_ERROR_LOG_PATH, 'a') as f:
+                f.write(f"Error: {str(e)}\n")
+            messages.error(self.request, str(e))
+            return render(self.request, self.template_name, {'form': form})
+        messages.success(self.request, f"File queued for summarization. Job ID: {job.pk}")
+        return redirect('pdfocrsummarize:pdf_ocr_summarizer')
 
     def form_invalid(self, form):
         messages.error(self.request, "Invalid form data.")
         return render(self.request, self.template_name, {'form': form})
 
 
+# Summarizes many uploaded documents (or the contents of .zip archives) in one request
+def summarizer_batch(request):
+    if request.method != 'POST':
+        return HttpResponse("Invalid request method")
+    form = SummarizerBatchForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+    try:
+        check_documents(form.cleaned_data['files'])
+    except (zipfile.BadZipFile, ValueError) as e:
+        return JsonResponse({'errors': {'files': [{'message': str(e), 'code': 'invalid'}]}}, status=400)
+    results = summarize_batch(
+        iter_documents(form.cleaned_data['files']), form.cleaned_data['sentence_count'],
+        form.cleaned_data['algorithm'] or 'frequency')
+    for result in results:
+        if 'results' in result:
+            index_summary(request.user, result['name'], result['results'])
+    return JsonResponse({'results': results})
+
+
 def register(request):
     if request.method == 'POST':
         form = CustomUserCreationForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            # Create the user profile
-            user_profile = UserProfile(
-                user=user,
-                cuid=form.cleaned_data['cuid'],
-                date_assigned=form.cleaned_data['date_assigned'],
-                cash_app_name=form.cleaned_data['cash_app_name'],
-                google_pay_integration=form.cleaned_data['google_pay_integration'],
-                pay_pal_integration=form.cleaned_data['pay_pal_integration'],
-                date_of_birth=form.cleaned_data['date_of_birth'],
-                gender=form.cleaned_data['gender'],
-                sir_name=form.cleaned_data['sir_name'],
-                first_name=form.cleaned_data['first_name'],
-                middle_name=form.cleaned_data['middle_name'],
-                last_name=form.cleaned_data['last_name'],
-                suffix_name=form.cleaned_data['suffix_name'],
-                language=form.cleaned_data['language'],
-                address=form.cleaned_data['address'],
-                mobile_phone=form.cleaned_data['mobile_phone'],
-                subscription_level=form.cleaned_data['subscription_level'],
-                date_added=form.cleaned_data['date_added']
-            )
-            user_profile.save()
+            # Creates the user and profile in one transaction
+            user = register_user(form)
 
             # Automatically log in the user after registration
             login(request, user)
@@ -138,6 +224,21 @@ def register(request):
 
     return render(request, 'pdfocrsummarize/register.html', {'form': form})
 
+
+# Enterprise onboarding: creates many users and profiles from a JSON array of signup rows
+@staff_member_required
+def register_bulk(request):
+    if request.method != 'POST':
+        return HttpResponse("Invalid request method")
+    try:
+        rows = json.loads(request.body)
+    except ValueError as e:
+        return JsonResponse({'errors': [{'message': str(e), 'code': 'invalid'}]}, status=400)
+    if not isinstance(rows, list):
+        return JsonResponse({'errors': [{'message': "Expected a JSON array.", 'code': 'invalid'}]}, status=400)
+    result = bulk_register_users(rows)
+    return JsonResponse(result, status=400 if result['errors'] else 201)
+
 # views.py
 
 
@@ -167,42 +268,26 @@ def login_view(request):  # Rename this function
 # Elevator App Tables
 # AppUserCompany Views
 
-    @login_required
-    def appusercompany_list(request):
-        companies = AppUserCompany.objects.all()
-        return render(request, 'pdfocrsummarize/appusercompany_table.html', {'companies': companies})
-
-    @login_required
-    def appusercompany_create(request):
-        # Create view for AppUserCompany
-        pass
-
-    @login_required
-    def appusercompany_update(request, pk):
-        company = AppUserCompany.objects.get(pk=pk)
-        if request.method == 'POST':
-            # Update company
-            company.parent_company_name = request.POST['parent_company_name']
-            company.email = request.POST['email']
-            company.address = request.POST['address']
-            company.website = request.POST['website']
-            company.save()
-        return redirect('appusercompany_list')
 
-    @login_required
-    def appusercompany_delete(request, pk):
-        company = AppUserCompany.objects.get(pk=pk)
-        if request.method == 'POST':
-            # Delete company
-            company.delete()
-        return redirect('appusercompany_list')
+@login_required
+def appusercompany_list(request):
+    page = keyset_paginate(
+        request, AppUserCompany.objects.filter(client_uid=request.user),
+        sort_fields=('id', 'parent_company_name', 'email'),
+        filter_fields=('parent_company_name', 'email'))
+    return render(request, 'pdfocrsummarize/appusercompany_table.html', {'companies': page, 'page': page})
+
 
 # AppUserDepartment Views
 
 
+@login_required
 def appuserdepartment_list(request):
-    departments = AppUserDepartment.objects.all()
-    return render(request, 'pdfocrsummarize/appuserdepartment_table.html', {'departments': departments})
+    page = keyset_paginate(
+        request, AppUserDepartment.objects.filter(client_uid=request.user),
+        sort_fields=('id', 'department', 'app_company_name'),
+        filter_fields=('department', 'app_company_name'))
+    return render(request, 'pdfocrsummarize/appuserdepartment_table.html', {'departments': page, 'page': page})
 
 
 def appuserdepartment_create(request):
@@ -221,9 +306,13 @@ def appuserdepartment_delete(request, pk):
 
 
 # AppUserGSText Views
+@login_required
 def appusergstext_list(request):
-    gstexts = AppUserGSText.objects.all()
-    return render(request, 'pdfocrsummarize/appusergstext_table.html', {'gstexts': gstexts})
+    page = keyset_paginate(
+        request, AppUserGSText.objects.filter(client_uid=request.user),
+        sort_fields=('id', 'department'),
+        filter_fields=('department',))
+    return render(request, 'pdfocrsummarize/appusergstext_table.html', {'gstexts': page, 'page': page})
 
 
 def appusergstext_create(request):
@@ -242,9 +331,13 @@ def appusergstext_delete(request, pk):
 
 
 # APIFetchData Views
+@login_required
 def apifetchdata_list(request):
-    apidatas = APIFetchData.objects.all()
-    return render(request, 'pdfocrsummarize/apifetchdata_table.html', {'apidatas': apidatas})
+    page = keyset_paginate(
+        request, APIFetchData.objects.filter(client_uid=request.user),
+        sort_fields=('id', 'api_name'),
+        filter_fields=('api_name', 'department', 'app_company_name', 'app_store_name'))
+    return render(request, 'pdfocrsummarize/apifetchdata_table.html', {'apidatas': page, 'page': page})
 
 
 def apifetchdata_create(request):
@@ -264,11 +357,14 @@ def apifetchdata_delete(request, pk):
 # AppUserCompany Create View
 
 
+@login_required
 def appusercompany_create(request):
     if request.method == 'POST':
         form = AppUserCompanyForm(request.POST)
         if form.is_valid():
-            form.save()
+            company = form.save(commit=False)
+            company.client_uid = request.user
+            company.save()
             messages.success(request, 'Company created successfully!')
             return redirect('pdfocrsummarize:appusercompany_list')
     else:
@@ -277,11 +373,14 @@ def appusercompany_create(request):
 
 
 # AppUserDepartment Create View
+@login_required
 def appuserdepartment_create(request):
     if request.method == 'POST':
         form = AppUserDepartmentForm(request.POST)
         if form.is_valid():
-            form.save()
+            department = form.save(commit=False)
+            department.client_uid = request.user
+            department.save()
             messages.success(request, 'Department created successfully!')
             return redirect('pdfocrsummarize:appuserdepartment_list')
     else:
@@ -290,11 +389,14 @@ def appuserdepartment_create(request):
 
 
 # AppUserGSText Create View
+@login_required
 def appusergstext_create(request):
     if request.method == 'POST':
         form = AppUserGSTextForm(request.POST)
         if form.is_valid():
-            form.save()
+            gstext = form.save(commit=False)
+            gstext.client_uid = request.user
+            gstext.save()
             messages.success(request, 'GSText created successfully!')
             return redirect('pdfocrsummarize:appusergstext_list')
     else:
@@ -303,11 +405,14 @@ def appusergstext_create(request):
 
 
 # APIFetchData Create View
+@login_required
 def apifetchdata_create(request):
     if request.method == 'POST':
         form = APIFetchDataForm(request.POST)
         if form.is_valid():
-            form.save()
+            apidata = form.save(commit=False)
+            apidata.client_uid = request.user
+            apidata.save()
             messages.success(request, 'APIFetchData created successfully!')
             return redirect('pdfocrsummarize:apifetchdata_list')
     else:
@@ -317,8 +422,9 @@ def apifetchdata_create(request):
 # AppUserCompany Update View
 
 
+@login_required
 def appusercompany_update(request, pk):
-    company = AppUserCompany.objects.get(pk=pk)
+    company = get_object_or_404(AppUserCompany, pk=pk, client_uid=request.user)
     if request.method == 'POST':
         form = AppUserCompanyForm(request.POST, instance=company)
         if form.is_valid():
@@ -331,8 +437,9 @@ def appusercompany_update(request, pk):
 
 
 # AppUserDepartment Update View
+@login_required
 def appuserdepartment_update(request, pk):
-    department = AppUserDepartment.objects.get(pk=pk)
+    department = get_object_or_404(AppUserDepartment, pk=pk, client_uid=request.user)
     if request.method == 'POST':
         form = AppUserDepartmentForm(request.POST, instance=department)
         if form.is_valid():
@@ -345,8 +452,9 @@ def appuserdepartment_update(request, pk):
 
 
 # AppUserGSText Update View
+@login_required
 def appusergstext_update(request, pk):
-    gstext = AppUserGSText.objects.get(pk=pk)
+    gstext = get_object_or_404(AppUserGSText, pk=pk, client_uid=request.user)
     if request.method == 'POST':
         form = AppUserGSTextForm(request.POST, instance=gstext)
         if form.is_valid():
@@ -359,8 +467,9 @@ def appusergstext_update(request, pk):
 
 
 # APIFetchData Update View
+@login_required
 def apifetchdata_update(request, pk):
-    apidata = APIFetchData.objects.get(pk=pk)
+    apidata = get_object_or_404(APIFetchData, pk=pk, client_uid=request.user)
     if request.method == 'POST':
         form = APIFetchDataForm(request.POST, instance=apidata)
         if form.is_valid():
@@ -374,8 +483,9 @@ def apifetchdata_update(request, pk):
 # AppUserCompany Delete View
 
 
+@login_required
 def appusercompany_delete(request, pk):
-    company = AppUserCompany.objects.get(pk=pk)
+    company = get_object_or_404(AppUserCompany, pk=pk, client_uid=request.user)
     if request.method == 'POST':
         company.delete()
         messages.success(request, 'Company deleted successfully!')
@@ -384,8 +494,9 @@ def appusercompany_delete(request, pk):
 
 
 # AppUserDepartment Delete View
+@login_required
 def appuserdepartment_delete(request, pk):
-    department = AppUserDepartment.objects.get(pk=pk)
+    department = get_object_or_404(AppUserDepartment, pk=pk, client_uid=request.user)
     if request.method == 'POST':
         department.delete()
         messages.success(request, 'Department deleted successfully!')
@@ -394,8 +505,9 @@ def appuserdepartment_delete(request, pk):
 
 
 # AppUserGSText Delete View
+@login_required
 def appusergstext_delete(request, pk):
-    gstext = AppUserGSText.objects.get(pk=pk)
+    gstext = get_object_or_404(AppUserGSText, pk=pk, client_uid=request.user)
     if request.method == 'POST':
         gstext.delete()
         messages.success(request, 'GSText deleted successfully!')
@@ -404,10 +516,140 @@ def appusergstext_delete(request, pk):
 
 
 # APIFetchData Delete View
+@login_required
 def apifetchdata_delete(request, pk):
-    apidata = APIFetchData.objects.get(pk=pk)
+    apidata = get_object_or_404(APIFetchData, pk=pk, client_uid=request.user)
     if request.method == 'POST':
         apidata.delete()
         messages.success(request, 'APIFetchData deleted successfully!')
         return redirect('pdfocrsummarize:apifetchdata_list')
     return render(request, 'pdfocrsummarize/apifetchdata_confirm_delete.html', {'apidata': apidata})
+
+
+# Bulk import of a CSV or JSON file into one of the elevator app tables
+@login_required
+def table_import(request, table):
+    if request.method != 'POST':
+        return HttpResponse("Invalid request method")
+    form = BulkImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors.get_json_data()}, status=400)
+    upload = form.cleaned_data['file']
+    fmt = get_format(upload.name, form.cleaned_data['format'])
+    try:
+        result = import_rows(table, parse_rows(upload, fmt), request.user)
+    except (ValueError, csv.Error) as e:
+        return JsonResponse({'errors': {'file': [{'message': str(e), 'code': 'invalid'}]}}, status=400)
+    return JsonResponse(result, status=400 if result['errors'] else 200)
+
+
+# Streams all of the user's rows of one elevator app table as CSV or JSON
+@login_required
+def table_export(request, table):
+    fmt = 'json' if request.GET.get('format') == 'json' else 'csv'
+    response = StreamingHttpResponse(
+        iter_export(table, request.user, fmt),
+        content_type='application/json' if fmt == 'json' else 'text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{table}.{fmt}"'
+    return response
+
+
+# Multi-select edit or delete of the user's rows in one elevator app table
+@login_required
+def table_bulk(request, table, list_url):
+    if request.method != 'POST':
+        return HttpResponse("Invalid request method")
+    ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()]
+    if not ids:
+        messages.error(request, 'No rows selected.')
+    elif request.POST.get('action') == 'delete':
+        deleted = bulk_delete_rows(table, request.user, ids)
+        messages.success(request, f'{deleted} rows deleted successfully!')
+    elif request.POST.get('action') == 'update':
+        updated, errors = bulk_update_rows(table, request.user, ids, request.POST)
+        if errors:
+            for field, field_errors in errors.items():
+                for error in field_errors:
+                    messages.error(request, f"{field}: {error['message']}")
+        else:
+            messages.success(request, f'{updated} rows updated successfully!')
+    else:
+        messages.error(request, 'Invalid bulk action.')
+    return redirect(list_url)
+
+
+# Ranked full-text search over the user's OCR output and summaries
+@login_required
+def search_documents(request):
+    query = request.GET.get('q', '')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+    except ValueError:
+        limit = 20
+    return JsonResponse({'query': query, 'results': search(request.user.pk, query, limit)})
+
+
+# Fields the APIFetchData JSON API may return; credentials are never exposed
+APIFETCHDATA_API_FIELDS = (
+    'id', 'department', 'api_name', 'app_store_name', 'app_company_name',
+    'addapi_newapi_drop', 'addapi_api_focus_expl', 'addapi_api_key_required',
+    'addapi_public_or_private_drop', 'addapi_url', 'addapi_query', 'addapi_method',
+    'addapi_max_attempts', 'addapi_max_per_unit', 'addapi_description',
+    'addapi_terms_and_conditions', 'addapi_additional_notes_drop', 'updated_at'
+)
+
+
+# JSON API over the user's APIFetchData rows. ?fields= picks the columns, pages are
+# keyset cursors like the list view, and unchanged pages answer 304 via the ETag. The
+# ETag covers the row count as well as the newest updated_at, so deletions change it;
+# Last-Modified cannot see deletions, so it is sent but If-Modified-Since is not honoured.
+@login_required
+def apifetchdata_api(request):
+    if request.method != 'GET':
+        return HttpResponse("Invalid request method")
+    requested = [f for f in request.GET.get('fields', '').split(',') if f in APIFETCHDATA_API_FIELDS]
+    sort = request.GET.get('sort', 'id').lstrip('-')
+    fields = list(dict.fromkeys(['id'] + requested + ([sort] if sort == 'api_name' else [])))
+    if not requested:
+        fields = list(APIFETCHDATA_API_FIELDS)
+
+    queryset = APIFetchData.objects.filter(client_uid=request.user)
+    stats = queryset.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    last_modified = stats['last_modified']
+    etag = quote_etag(hashlib.md5(
+        f"{request.GET.urlencode()}:{last_modified}:{stats['count']}".encode('utf-8')
+    ).hexdigest())
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    page = keyset_paginate(
+        request, queryset.values(*fields),
+        sort_fields=('id', 'api_name'),
+        filter_fields=('api_name', 'department', 'app_company_name', 'app_store_name'))
+
+    def stream():
+        yield '{"results": ['
+        for i, row in enumerate(page):
+            yield (',' if i else '') + json.dumps(row, cls=DjangoJSONEncoder)
+        yield '], "next_cursor": %s}' % json.dumps(page.next_cursor)
+
+    response = StreamingHttpResponse(stream(), content_type='application/json')
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+# Prometheus scrape endpoint. With METRICS_TOKEN set, scrapers must send it as a
+# bearer token; otherwise only staff sessions may read it.
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')):
+            return HttpResponse('Unauthorized', status=401)
+    elif not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse('Forbidden', status=403)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')